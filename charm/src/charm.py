@@ -27,7 +27,11 @@ class ReleaseMonitorGcloudCharm(ops.CharmBase):
         super().__init__(framework)
         self._stored.set_default(
             config_fingerprint="",
+            input_fingerprint="",
+            render_signature="",
+            unit_signature="",
             wheel_digest="",
+            wheel_signature="",
             wheel_version="",
             webhook_source="",
         )
@@ -36,7 +40,7 @@ class ReleaseMonitorGcloudCharm(ops.CharmBase):
         framework.observe(self.on.install, self._on_reconcile)
         framework.observe(self.on.start, self._on_reconcile)
         framework.observe(self.on.config_changed, self._on_reconcile)
-        framework.observe(self.on.upgrade_charm, self._on_reconcile)
+        framework.observe(self.on.upgrade_charm, self._on_upgrade_charm)
         framework.observe(self.on.update_status, self._on_reconcile)
         framework.observe(self.on.secret_changed, self._on_reconcile)
 
@@ -51,9 +55,9 @@ class ReleaseMonitorGcloudCharm(ops.CharmBase):
         framework.observe(self.on.show_effective_config_action, self._on_show_effective_config_action)
         framework.observe(self.on.service_restart_action, self._on_service_restart_action)
 
-    def _on_reconcile(self, _event: Any) -> None:
+    def _on_reconcile(self, event: Any) -> None:
         try:
-            self._runtime.reconcile()
+            self._runtime.reconcile(allow_fast_path=isinstance(event, ops.UpdateStatusEvent))
         except ReconcileError as exc:
             logger.info("reconcile blocked: %s", exc)
             if exc.stop_service:
@@ -63,6 +67,10 @@ class ReleaseMonitorGcloudCharm(ops.CharmBase):
             logger.exception("reconcile failed")
             self.unit.status = BlockedStatus("reconcile failed; check unit logs")
 
+    def _on_upgrade_charm(self, event: Any) -> None:
+        self._stored.render_signature = ""
+        self._on_reconcile(event)
+
     def _on_stop(self, _event: Any) -> None:
         self._runtime.stop_service()
 
@@ -17,4 +17,7 @@ ETC_DIR = Path("/etc/release-monitor-gcloud")
 CONFIG_PATH = ETC_DIR / "config.yaml"
 SERVICE_PATH = Path("/etc/systemd/system") / SERVICE_NAME
 VENV_DIR = Path("/opt/release-monitor-gcloud/venv")
+VENV_PYTHON = VENV_DIR / "bin" / "python"
+VENV_PIP = VENV_DIR / "bin" / "pip"
+MONITOR_BIN = VENV_DIR / "bin" / "gcs-release-monitor"
 GCS_CREDENTIALS_PATH = SECRETS_DIR / "gcs-service-account.json"
@@ -9,7 +9,7 @@ class ReconcileError(ValueError):
         self.stop_service = stop_service
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SecretBundle:
     nextcloud_username: str | None
     nextcloud_app_password: str | None
@@ -17,14 +17,15 @@ class SecretBundle:
     gcs_service_account_json: str | None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WebhookResolution:
     url: str
     shared_secret: str
     source: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class WheelInstall:
     digest: str
+    signature: str
     version: str
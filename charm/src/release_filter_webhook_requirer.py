@@ -1,12 +1,18 @@
 from __future__ import annotations
 
 from collections.abc import Callable, Mapping
+from operator import attrgetter
 from typing import Any
 
 import constants as c
 from models import ReconcileError, WebhookResolution
 
 
+def _stripped(data: Mapping[str, Any], key: str) -> str:
+    value = data.get(key)
+    return "" if value is None else str(value).strip()
+
+
 class ReleaseFilterWebhookRequirer:
     def __init__(
         self,
@@ -18,73 +24,92 @@ class ReleaseFilterWebhookRequirer:
         self._read_secret_content = read_secret_content
 
     def resolve(self, config: Mapping[str, Any]) -> WebhookResolution:
-        relations = sorted(self._relations, key=lambda rel: rel.id)
-        if relations:
-            relation = relations[0]
-            if relation.app is None:
-                raise ReconcileError("invalid relation contract: missing remote application")
-            remote_data = relation.data[relation.app]
-            protocol_version = str(remote_data.get("protocol_version", "")).strip()
-            if protocol_version != c.PROTOCOL_VERSION:
-                raise ReconcileError(
-                    f"invalid relation contract: protocol_version must be {c.PROTOCOL_VERSION}"
-                )
-            webhook_url = str(remote_data.get("webhook_url", "")).strip()
-            if not webhook_url:
-                raise ReconcileError("invalid relation contract: missing webhook_url")
-
-            relation_secret_id = str(remote_data.get("secret_id", "")).strip()
-            relation_plaintext_secret = str(remote_data.get("webhook_secret", "")).strip()
-
-            if relation_secret_id:
-                relation_secret = self._read_secret_content(relation_secret_id)
-                shared_secret = str(relation_secret.get("shared-secret", "")).strip()
-                if not shared_secret:
-                    raise ReconcileError(
-                        "missing required secret field shared-secret in relation secret_id"
-                    )
-                return WebhookResolution(
-                    url=webhook_url,
-                    shared_secret=shared_secret,
-                    source="relation-secret-id",
-                )
-
-            if relation_plaintext_secret:
-                return WebhookResolution(
-                    url=webhook_url,
-                    shared_secret=relation_plaintext_secret,
-                    source="relation-plaintext",
-                )
-
-            fallback_secret_id = str(config.get("webhook-shared-secret-secret-id", "")).strip()
-            if fallback_secret_id:
-                fallback_content = self._read_secret_content(fallback_secret_id)
-                shared_secret = str(fallback_content.get("shared-secret", "")).strip()
-                if not shared_secret:
-                    raise ReconcileError(
-                        "missing required secret field shared-secret in webhook-shared-secret"
-                    )
-                return WebhookResolution(
-                    url=webhook_url,
-                    shared_secret=shared_secret,
-                    source="relation-url+config-secret",
-                )
+        relation = min(self._relations, key=attrgetter("id"), default=None)
+        if relation is None:
+            return self._resolve_config_fallback(config)
+
+        remote_data = self._remote_app_data(relation)
+        webhook_url = _stripped(remote_data, "webhook_url")
+        if not webhook_url:
+            raise ReconcileError("invalid relation contract: missing webhook_url")
+
+        resolvers = (
+            self._resolve_relation_secret_id,
+            self._resolve_relation_plaintext,
+            self._resolve_relation_url_config_secret,
+        )
+        for resolver in resolvers:
+            resolution = resolver(webhook_url, remote_data, config)
+            if resolution is not None:
+                return resolution
+
+        raise ReconcileError(
+            "missing webhook secret: relation secret_id, relation webhook_secret, or webhook-shared-secret-secret-id"
+        )
 
+    def _remote_app_data(self, relation: Any) -> Mapping[str, Any]:
+        if relation.app is None:
+            raise ReconcileError("invalid relation contract: missing remote application")
+        remote_data = relation.data[relation.app]
+        if _stripped(remote_data, "protocol_version") != c.PROTOCOL_VERSION:
             raise ReconcileError(
-                "missing webhook secret: relation secret_id, relation webhook_secret, or webhook-shared-secret-secret-id"
+                f"invalid relation contract: protocol_version must be {c.PROTOCOL_VERSION}"
             )
+        return remote_data
 
-        fallback_url = str(config.get("webhook-url", "")).strip()
+    def _resolve_relation_secret_id(
+        self, webhook_url: str, remote_data: Mapping[str, Any], _config: Mapping[str, Any]
+    ) -> WebhookResolution | None:
+        secret_id = _stripped(remote_data, "secret_id")
+        if not secret_id:
+            return None
+        return WebhookResolution(
+            url=webhook_url,
+            shared_secret=self._shared_secret(secret_id, "relation secret_id"),
+            source="relation-secret-id",
+        )
+
+    def _resolve_relation_plaintext(
+        self, webhook_url: str, remote_data: Mapping[str, Any], _config: Mapping[str, Any]
+    ) -> WebhookResolution | None:
+        plaintext_secret = _stripped(remote_data, "webhook_secret")
+        if not plaintext_secret:
+            return None
+        return WebhookResolution(
+            url=webhook_url,
+            shared_secret=plaintext_secret,
+            source="relation-plaintext",
+        )
+
+    def _resolve_relation_url_config_secret(
+        self, webhook_url: str, _remote_data: Mapping[str, Any], config: Mapping[str, Any]
+    ) -> WebhookResolution | None:
+        secret_id = _stripped(config, "webhook-shared-secret-secret-id")
+        if not secret_id:
+            return None
+        return WebhookResolution(
+            url=webhook_url,
+            shared_secret=self._shared_secret(secret_id, "webhook-shared-secret"),
+            source="relation-url+config-secret",
+        )
+
+    def _resolve_config_fallback(self, config: Mapping[str, Any]) -> WebhookResolution:
+        fallback_url = _stripped(config, "webhook-url")
         if not fallback_url:
             raise ReconcileError("missing webhook URL: relation webhook_url or config webhook-url")
 
-        fallback_secret_id = str(config.get("webhook-shared-secret-secret-id", "")).strip()
-        if not fallback_secret_id:
+        secret_id = _stripped(config, "webhook-shared-secret-secret-id")
+        if not secret_id:
             raise ReconcileError("missing required config: webhook-shared-secret-secret-id")
 
-        fallback_content = self._read_secret_content(fallback_secret_id)
-        shared_secret = str(fallback_content.get("shared-secret", "")).strip()
-        if not shared_secret:
-            raise ReconcileError("missing required secret field shared-secret in webhook-shared-secret")
+        return WebhookResolution(
+            url=fallback_url,
+            shared_secret=self._shared_secret(secret_id, "webhook-shared-secret"),
+            source="config-fallback",
+        )
 
-        return WebhookResolution(url=fallback_url, shared_secret=shared_secret, source="config-fallback")
+    def _shared_secret(self, secret_id: str, secret_label: str) -> str:
+        shared_secret = _stripped(self._read_secret_content(secret_id), "shared-secret")
+        if not shared_secret:
+            raise ReconcileError(f"missing required secret field shared-secret in {secret_label}")
+        return shared_secret
@@ -1,63 +1,135 @@
 from __future__ import annotations
 
+import dataclasses
+import grp
 import hashlib
+import importlib.metadata
 import json
 import os
+import pwd
 import shutil
+import stat
 import zipfile
+from collections.abc import Callable
 from pathlib import Path
 from typing import Any
 
-import yaml
 from ops.charm import ActionEvent
 from ops.model import ActiveStatus, ModelError, SecretNotFoundError
 
 import constants as c
-from models import ReconcileError, SecretBundle, WheelInstall
+from models import ReconcileError, SecretBundle, WebhookResolution, WheelInstall
 from release_filter_webhook_requirer import ReleaseFilterWebhookRequirer
-from rendering import build_render_config, dump_yaml, redact_config, render_service_unit, tail_text
+from rendering import (
+    build_render_config,
+    config_str,
+    dump_yaml,
+    dump_yaml_bytes,
+    load_yaml,
+    redact_config,
+    render_service_unit,
+    tail_text,
+)
+
+_HASH_CHUNK_SIZE = 1 << 20
+_FILE_DIGEST = getattr(hashlib, "file_digest", None)
+_MONITOR_DISTRIBUTION = "gcs-release-monitor"
+
+
+def _canonical_json(data: Any) -> bytes:
+    return json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _wheel_hasher() -> Any:
+    return hashlib.blake2b(digest_size=32)
+
+
+def _account_exists(lookup: Callable[[str], Any], name: str) -> bool:
+    try:
+        lookup(name)
+    except KeyError:
+        return False
+    return True
+
+
+def _account_ids(user: str, group: str) -> tuple[int, int] | None:
+    try:
+        return pwd.getpwnam(user).pw_uid, grp.getgrnam(group).gr_gid
+    except KeyError:
+        return None
+
+
+def _venv_site_packages() -> list[str]:
+    return sorted(str(path) for path in c.VENV_DIR.glob("lib/python3.*/site-packages"))
 
 
 class ReleaseMonitorRuntime:
     def __init__(self, charm: Any):
         self._charm = charm
+        self._secret_cache: dict[str, dict[str, str]] = {}
+        self._service_active: bool | None = None
 
-    def reconcile(self) -> None:
+    def reconcile(self, *, allow_fast_path: bool = False) -> None:
+        self._service_active = None
         if int(self._charm.app.planned_units()) > 1:
             raise ReconcileError("single-unit charm; scale to 1")
 
-        secrets = self._resolve_secret_bundle()
+        config = dict(self._charm.config)
+        input_fingerprint = self._compute_input_fingerprint(config)
+        if (
+            allow_fast_path
+            and input_fingerprint
+            and input_fingerprint == str(self._charm._stored.input_fingerprint)
+            and c.CONFIG_PATH.exists()
+            and c.SERVICE_PATH.exists()
+            and self._is_service_active()
+        ):
+            self._charm.unit.status = ActiveStatus(
+                f"service active (webhook: {self._charm._stored.webhook_source})"
+            )
+            return
+        self._charm._stored.input_fingerprint = ""
+
+        secrets = self._resolve_secret_bundle(config)
         webhook = ReleaseFilterWebhookRequirer(
             relations=list(self._charm.model.relations.get(c.RELATION_NAME, [])),
             read_secret_content=self._read_secret_content,
-        ).resolve(dict(self._charm.config))
+        ).resolve(config)
 
         self._ensure_service_user_group()
         self._ensure_runtime_dirs()
         wheel = self._ensure_venv_and_wheel()
 
         gcs_credentials_file = self._write_gcs_credentials_if_needed(secrets)
-        config_map = build_render_config(
-            dict(self._charm.config),
-            secrets,
-            webhook,
-            gcs_credentials_file=gcs_credentials_file,
+        render_key = self._compute_render_key(
+            config, secrets, webhook, gcs_credentials_file, wheel.digest
         )
+        config_payload = self._installed_config_payload(render_key)
+        if config_payload is None:
+            config_map = build_render_config(
+                config,
+                secrets,
+                webhook,
+                gcs_credentials_file=gcs_credentials_file,
+            )
 
-        candidate_path = Path(f"{c.CONFIG_PATH}.new")
-        config_yaml = dump_yaml(config_map)
-        candidate_path.write_text(config_yaml, encoding="utf-8")
-        shutil.chown(candidate_path, user=c.APP_USER, group=c.APP_GROUP)
-        os.chmod(candidate_path, 0o640)
-
-        self._charm._validate_candidate_config(candidate_path)
-        os.replace(candidate_path, c.CONFIG_PATH)
-        shutil.chown(c.CONFIG_PATH, user=c.APP_USER, group=c.APP_GROUP)
-        os.chmod(c.CONFIG_PATH, 0o640)
+            candidate_path = Path(f"{c.CONFIG_PATH}.new")
+            config_payload = dump_yaml_bytes(config_map)
+            candidate_path.write_bytes(config_payload)
+            shutil.chown(candidate_path, user=c.APP_USER, group=c.APP_GROUP)
+            os.chmod(candidate_path, 0o640)
+
+            self._charm._validate_candidate_config(candidate_path)
+            os.replace(candidate_path, c.CONFIG_PATH)
+            shutil.chown(c.CONFIG_PATH, user=c.APP_USER, group=c.APP_GROUP)
+            os.chmod(c.CONFIG_PATH, 0o640)
+            self._charm._stored.render_signature = (
+                f"{render_key}:{c.CONFIG_PATH.stat().st_mtime_ns}"
+            )
 
-        unit_text = self._install_systemd_unit(str(self._charm.config.get("log-level", "INFO")))
+        unit_text = self._install_systemd_unit(str(config.get("log-level", "INFO")))
 
-        fingerprint = self._compute_fingerprint(config_yaml, unit_text, wheel.digest)
+        fingerprint = self._compute_fingerprint(config_payload, unit_text, wheel.digest)
         restart_required = fingerprint != str(self._charm._stored.config_fingerprint)
 
         self._ensure_service_running(restart=restart_required)
@@ -66,15 +138,18 @@ class ReleaseMonitorRuntime:
 
         self._charm._stored.config_fingerprint = fingerprint
         self._charm._stored.wheel_digest = wheel.digest
+        self._charm._stored.wheel_signature = wheel.signature
         self._charm._stored.wheel_version = wheel.version
         self._charm._stored.webhook_source = webhook.source
+        self._charm._stored.input_fingerprint = input_fingerprint
         self._charm.unit.status = ActiveStatus(f"service active (webhook: {webhook.source})")
 
     def stop_service(self) -> None:
+        self._service_active = None
         self._charm._run(["systemctl", "disable", "--now", c.SERVICE_NAME], check=False)
 
     def run_once_action(self, event: ActionEvent, *, dry_run: bool) -> None:
-        monitor_bin = c.VENV_DIR / "bin" / "gcs-release-monitor"
+        monitor_bin = c.MONITOR_BIN
         if not monitor_bin.exists():
             event.fail("monitor binary is not installed")
             return
@@ -109,19 +184,21 @@ class ReleaseMonitorRuntime:
     def show_effective_config_action(self, event: ActionEvent) -> None:
         try:
             if c.CONFIG_PATH.exists():
-                raw = yaml.safe_load(c.CONFIG_PATH.read_text(encoding="utf-8"))
+                with c.CONFIG_PATH.open("rb") as handle:
+                    raw = load_yaml(handle)
                 if not isinstance(raw, dict):
                     raise ReconcileError(f"unexpected config format in {c.CONFIG_PATH}")
                 rendered = raw
             else:
-                secrets = self._resolve_secret_bundle()
+                config = dict(self._charm.config)
+                secrets = self._resolve_secret_bundle(config)
                 webhook = ReleaseFilterWebhookRequirer(
                     relations=list(self._charm.model.relations.get(c.RELATION_NAME, [])),
                     read_secret_content=self._read_secret_content,
-                ).resolve(dict(self._charm.config))
+                ).resolve(config)
                 gcs_path = str(c.GCS_CREDENTIALS_PATH) if secrets.gcs_service_account_json else None
                 rendered = build_render_config(
-                    dict(self._charm.config),
+                    config,
                     secrets,
                     webhook,
                     gcs_credentials_file=gcs_path,
@@ -146,7 +223,7 @@ class ReleaseMonitorRuntime:
         event.set_results({"service": c.SERVICE_NAME, "restarted": True})
 
     def validate_candidate_config(self, candidate_path: Path) -> None:
-        python_bin = c.VENV_DIR / "bin" / "python"
+        python_bin = c.VENV_PYTHON
         command = (
             "from gcs_release_monitor.config import load_config; "
             f"load_config(r'{candidate_path}')"
@@ -156,9 +233,8 @@ class ReleaseMonitorRuntime:
             message = str(result.stderr).strip() or str(result.stdout).strip() or "validation failed"
             raise ReconcileError(f"invalid rendered config: {message}", stop_service=False)
 
-    def _resolve_secret_bundle(self) -> SecretBundle:
-        config = dict(self._charm.config)
-        delivery_mode = str(config.get("delivery-mode", "full")).strip().lower()
+    def _resolve_secret_bundle(self, config: dict[str, Any]) -> SecretBundle:
+        delivery_mode = config_str(config, "delivery-mode", "full").lower()
         if delivery_mode not in {"full", "webhook_only"}:
             raise ReconcileError("invalid config: delivery-mode must be one of full, webhook_only")
 
@@ -166,14 +242,14 @@ class ReleaseMonitorRuntime:
         app_password: str | None = None
         share_password: str | None = None
         if delivery_mode == "full":
-            nextcloud_secret_id = str(config.get("nextcloud-credentials-secret-id", "")).strip()
+            nextcloud_secret_id = config_str(config, "nextcloud-credentials-secret-id")
             if not nextcloud_secret_id:
                 raise ReconcileError("missing required config: nextcloud-credentials-secret-id")
             nextcloud_content = self._read_secret_content(nextcloud_secret_id)
 
-            username = str(nextcloud_content.get("username", "")).strip()
-            app_password = str(nextcloud_content.get("app-password", "")).strip()
-            share_password = str(nextcloud_content.get("share-password", "")).strip() or None
+            username = nextcloud_content.get("username", "")
+            app_password = nextcloud_content.get("app-password", "")
+            share_password = nextcloud_content.get("share-password", "") or None
             if not username:
                 raise ReconcileError("missing required secret field username in nextcloud-credentials")
             if not app_password:
@@ -184,13 +260,13 @@ class ReleaseMonitorRuntime:
         gcs_service_account_json: str | None = None
         anonymous = bool(config.get("gcs-anonymous", False))
         use_gcloud_cli = bool(config.get("gcs-use-gcloud-cli", False))
-        gcs_secret_id = str(config.get("gcs-service-account-secret-id", "")).strip()
+        gcs_secret_id = config_str(config, "gcs-service-account-secret-id")
 
         if not anonymous and not use_gcloud_cli:
             if not gcs_secret_id:
                 raise ReconcileError("missing required config: gcs-service-account-secret-id")
             gcs_content = self._read_secret_content(gcs_secret_id)
-            gcs_service_account_json = str(gcs_content.get("service-account-json", "")).strip()
+            gcs_service_account_json = gcs_content.get("service-account-json", "")
             if not gcs_service_account_json:
                 raise ReconcileError(
                     "missing required secret field service-account-json in gcs-service-account"
@@ -204,6 +280,10 @@ class ReleaseMonitorRuntime:
         )
 
     def _read_secret_content(self, secret_id: str) -> dict[str, str]:
+        cached = self._secret_cache.get(secret_id)
+        if cached is not None:
+            return cached
+
         try:
             secret = self._charm.model.get_secret(id=secret_id)
         except (SecretNotFoundError, ModelError) as exc:
@@ -216,13 +296,15 @@ class ReleaseMonitorRuntime:
 
         if not isinstance(content, dict):
             raise ReconcileError(f"invalid secret content for {secret_id}")
-        return {str(key): str(value) for key, value in content.items()}
+        normalized = {str(key): str(value).strip() for key, value in content.items()}
+        self._secret_cache[secret_id] = normalized
+        return normalized
 
     def _ensure_service_user_group(self) -> None:
-        if self._charm._run(["getent", "group", c.APP_GROUP], check=False).returncode != 0:
+        if not _account_exists(grp.getgrnam, c.APP_GROUP):
             self._charm._run(["groupadd", "--system", c.APP_GROUP])
 
-        if self._charm._run(["id", "-u", c.APP_USER], check=False).returncode != 0:
+        if not _account_exists(pwd.getpwnam, c.APP_USER):
             self._charm._run(
                 [
                     "useradd",
@@ -239,12 +321,15 @@ class ReleaseMonitorRuntime:
             )
 
     def _ensure_runtime_dirs(self) -> None:
-        for path in (c.APP_DIR, c.STATE_DIR, c.TEMP_DIR, c.SECRETS_DIR, c.ETC_DIR):
-            path.mkdir(parents=True, exist_ok=True)
-
+        owner = _account_ids(c.APP_USER, c.APP_GROUP)
         for path in (c.APP_DIR, c.STATE_DIR, c.TEMP_DIR, c.SECRETS_DIR):
-            shutil.chown(path, user=c.APP_USER, group=c.APP_GROUP)
-            os.chmod(path, 0o750)
+            path.mkdir(parents=True, exist_ok=True)
+            path_stat = path.stat()
+            if owner is None or (path_stat.st_uid, path_stat.st_gid) != owner:
+                shutil.chown(path, user=c.APP_USER, group=c.APP_GROUP)
+            if stat.S_IMODE(path_stat.st_mode) != 0o750:
+                os.chmod(path, 0o750)
+        c.ETC_DIR.mkdir(parents=True, exist_ok=True)
 
     def _ensure_venv_and_wheel(self) -> WheelInstall:
         try:
@@ -256,12 +341,19 @@ class ReleaseMonitorRuntime:
 
         if not wheel_path.exists() or not wheel_path.is_file():
             raise ReconcileError(f"unreadable wheel resource: {wheel_path}", stop_service=False)
+        wheel_stat = wheel_path.stat()
+        signature = (
+            f"{wheel_path}:{wheel_stat.st_ino}:{wheel_stat.st_size}:{wheel_stat.st_mtime_ns}"
+        )
         wheel_path = self._normalized_wheel_path(wheel_path)
 
-        digest = hashlib.sha256(wheel_path.read_bytes()).hexdigest()
-        python_bin = c.VENV_DIR / "bin" / "python"
-        pip_bin = c.VENV_DIR / "bin" / "pip"
-        cli_bin = c.VENV_DIR / "bin" / "gcs-release-monitor"
+        if signature == str(self._charm._stored.wheel_signature) and self._charm._stored.wheel_digest:
+            digest = str(self._charm._stored.wheel_digest)
+        else:
+            digest = self._wheel_digest(wheel_path)
+        python_bin = c.VENV_PYTHON
+        pip_bin = c.VENV_PIP
+        cli_bin = c.MONITOR_BIN
 
         if not python_bin.exists():
             self._charm._run(["python3", "-m", "venv", str(c.VENV_DIR)])
@@ -313,10 +405,28 @@ class ReleaseMonitorRuntime:
         if not version:
             raise ReconcileError("failed to determine installed gcs-release-monitor version", stop_service=False)
 
-        return WheelInstall(digest=digest, version=version)
+        return WheelInstall(digest=digest, signature=signature, version=version)
+
+    def _wheel_digest(self, wheel_path: Path) -> str:
+        with wheel_path.open("rb", buffering=0) as handle:
+            if _FILE_DIGEST is not None:
+                return _FILE_DIGEST(handle, _wheel_hasher).hexdigest()
+            hasher = _wheel_hasher()
+            for chunk in iter(lambda: handle.read(_HASH_CHUNK_SIZE), b""):
+                hasher.update(chunk)
+        return hasher.hexdigest()
 
     def _installed_package_version(self, python_bin: Path) -> str:
-        command = "import importlib.metadata as m; print(m.version('gcs-release-monitor'))"
+        distribution = next(
+            importlib.metadata.distributions(
+                name=_MONITOR_DISTRIBUTION, path=_venv_site_packages()
+            ),
+            None,
+        )
+        if distribution is not None:
+            return str(distribution.version).strip()
+
+        command = f"import importlib.metadata as m; print(m.version('{_MONITOR_DISTRIBUTION}'))"
         result = self._charm._run([str(python_bin), "-c", command], capture_output=True, check=False)
         if result.returncode != 0:
             raise ReconcileError("failed to read installed wheel metadata", stop_service=False)
@@ -426,36 +536,118 @@ class ReleaseMonitorRuntime:
 
     def _install_systemd_unit(self, log_level: str) -> str:
         unit_text = render_service_unit(log_level=log_level)
-        existing = c.SERVICE_PATH.read_text(encoding="utf-8") if c.SERVICE_PATH.exists() else None
+        unit_digest = hashlib.blake2b(unit_text.encode("utf-8"), digest_size=16).hexdigest()
+        try:
+            unit_mtime_ns = c.SERVICE_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            unit_mtime_ns = None
+        if unit_mtime_ns is not None and f"{unit_digest}:{unit_mtime_ns}" == str(
+            self._charm._stored.unit_signature
+        ):
+            return unit_text
+
+        existing = c.SERVICE_PATH.read_text(encoding="utf-8") if unit_mtime_ns is not None else None
         if existing != unit_text:
             c.SERVICE_PATH.parent.mkdir(parents=True, exist_ok=True)
             c.SERVICE_PATH.write_text(unit_text, encoding="utf-8")
             os.chmod(c.SERVICE_PATH, 0o644)
             self._charm._run(["systemctl", "daemon-reload"])
+        self._charm._stored.unit_signature = f"{unit_digest}:{c.SERVICE_PATH.stat().st_mtime_ns}"
         return unit_text
 
-    def _compute_fingerprint(self, config_yaml: str, unit_text: str, wheel_digest: str) -> str:
-        material = json.dumps(
+    def _compute_fingerprint(
+        self, config_payload: bytes, unit_text: str, wheel_digest: str
+    ) -> str:
+        hasher = hashlib.blake2b(digest_size=32)
+        for encoded in (config_payload, unit_text.encode("utf-8"), wheel_digest.encode("utf-8")):
+            hasher.update(len(encoded).to_bytes(8, "little"))
+            hasher.update(encoded)
+        return hasher.hexdigest()
+
+    def _compute_render_key(
+        self,
+        config: dict[str, Any],
+        secrets: SecretBundle,
+        webhook: WebhookResolution,
+        gcs_credentials_file: str | None,
+        wheel_digest: str,
+    ) -> str:
+        material = _canonical_json(
             {
-                "config": config_yaml,
-                "unit": unit_text,
+                "config": config,
+                "secrets": dataclasses.asdict(secrets),
+                "webhook": dataclasses.asdict(webhook),
+                "gcs_credentials_file": gcs_credentials_file,
                 "wheel_digest": wheel_digest,
-            },
-            sort_keys=True,
+            }
+        )
+        return hashlib.blake2b(material, digest_size=32).hexdigest()
+
+    def _installed_config_payload(self, render_key: str) -> bytes | None:
+        try:
+            config_mtime_ns = c.CONFIG_PATH.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if f"{render_key}:{config_mtime_ns}" != str(self._charm._stored.render_signature):
+            return None
+        return c.CONFIG_PATH.read_bytes()
+
+    def _compute_input_fingerprint(self, config: dict[str, Any]) -> str:
+        try:
+            wheel_path = Path(self._charm.model.resources.fetch(c.RESOURCE_NAME))
+            wheel_stat = wheel_path.stat()
+        except (ModelError, RuntimeError, OSError):
+            return ""
+
+        relations = []
+        for relation in self._charm.model.relations.get(c.RELATION_NAME, []):
+            remote_data = dict(relation.data[relation.app]) if relation.app is not None else None
+            relations.append([relation.id, remote_data])
+
+        material = _canonical_json(
+            {
+                "config": config,
+                "relations": sorted(relations, key=lambda item: item[0]),
+                "wheel": [
+                    str(wheel_path),
+                    wheel_stat.st_ino,
+                    wheel_stat.st_size,
+                    wheel_stat.st_mtime_ns,
+                ],
+            }
         )
-        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+        return hashlib.blake2b(material, digest_size=16).hexdigest()
 
     def _is_service_active(self) -> bool:
-        result = self._charm._run(["systemctl", "is-active", "--quiet", c.SERVICE_NAME], check=False)
-        return result.returncode == 0
+        if self._service_active is None:
+            result = self._charm._run(
+                ["systemctl", "is-active", "--quiet", c.SERVICE_NAME], check=False
+            )
+            self._service_active = result.returncode == 0
+        return self._service_active
+
+    def _service_state(self) -> dict[str, str]:
+        result = self._charm._run(
+            ["systemctl", "show", "-p", "ActiveState", "-p", "UnitFileState", c.SERVICE_NAME],
+            capture_output=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            return {}
+        state = dict(
+            line.split("=", 1) for line in str(result.stdout).splitlines() if "=" in line
+        )
+        self._service_active = state.get("ActiveState") == "active"
+        return state
 
     def _ensure_service_running(self, *, restart: bool) -> None:
-        self._charm._run(["systemctl", "enable", c.SERVICE_NAME], check=False)
         if restart:
-            if self._is_service_active():
-                self._charm._run(["systemctl", "restart", c.SERVICE_NAME])
-            else:
-                self._charm._run(["systemctl", "start", c.SERVICE_NAME])
+            self._charm._run(["systemctl", "enable", c.SERVICE_NAME], check=False)
+            self._service_active = None
+            self._charm._run(["systemctl", "restart", c.SERVICE_NAME])
             return
-        if not self._is_service_active():
-            self._charm._run(["systemctl", "start", c.SERVICE_NAME])
+        state = self._service_state()
+        if state.get("ActiveState") == "active" and state.get("UnitFileState") == "enabled":
+            return
+        self._service_active = None
+        self._charm._run(["systemctl", "enable", "--now", c.SERVICE_NAME], check=False)
@@ -1,18 +1,25 @@
 from __future__ import annotations
 
+import copy
 import json
+from collections import deque
+from collections.abc import Mapping
+from functools import lru_cache
 from pathlib import Path
 from string import Template
-from typing import Any
+from typing import IO, Any
 
 import yaml
 
 import constants as c
 from models import ReconcileError, SecretBundle, WebhookResolution
 
-SERVICE_UNIT_TEMPLATE_PATH = (
-    Path(__file__).resolve().parent.parent / "templates" / "release-monitor-gcloud.service.tmpl"
-)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+CHARM_ROOT = Path(__file__).resolve().parent.parent
+TEMPLATES_DIR = CHARM_ROOT / "templates"
+SERVICE_UNIT_TEMPLATE_PATH = TEMPLATES_DIR / "release-monitor-gcloud.service.tmpl"
 DEFAULT_SERVICE_UNIT_TEMPLATE = """[Unit]
 Description=release-monitor-gcloud service
 After=network-online.target
@@ -36,27 +43,59 @@ WantedBy=multi-user.target
 """
 
 
+_EMPTY_JSON_ARRAY = "[]"
+
+
 def parse_json_array_option(raw: str, option_name: str) -> list[Any]:
+    if raw == _EMPTY_JSON_ARRAY:
+        return []
     try:
-        parsed = json.loads(raw)
+        parsed = _parse_json_array(raw)
     except json.JSONDecodeError as exc:
         raise ReconcileError(f"invalid JSON for {option_name}: {exc.msg}", stop_service=False) from exc
-    if not isinstance(parsed, list):
+    if parsed is None:
         raise ReconcileError(f"{option_name} must be a JSON array", stop_service=False)
-    return parsed
+    if any(isinstance(item, (dict, list)) for item in parsed):
+        return copy.deepcopy(list(parsed))
+    return list(parsed)
+
+
+@lru_cache(maxsize=128)
+def _parse_json_array(raw: str) -> tuple[Any, ...] | None:
+    parsed = json.loads(raw)
+    if not isinstance(parsed, list):
+        return None
+    return tuple(parsed)
+
+
+def config_str(config: Mapping[str, Any], key: str, default: str = "", *, strip: bool = True) -> str:
+    value = config.get(key)
+    if value is None:
+        return default
+    if type(value) is not str:
+        value = str(value)
+    return value.strip() if strip else value
 
 
 def _non_empty(config: dict[str, Any], key: str) -> str:
-    value = str(config.get(key, "")).strip()
+    value = config_str(config, key)
     if not value:
         raise ReconcileError(f"missing required config: {key}")
     return value
 
 
+def _json_array(config: Mapping[str, Any], key: str) -> list[Any]:
+    return parse_json_array_option(config_str(config, key, _EMPTY_JSON_ARRAY, strip=False), key)
+
+
 def _parse_chain_ids(raw: list[Any]) -> list[int]:
     chain_ids: list[int] = []
     for item in raw:
-        if isinstance(item, bool):
+        item_type = type(item)
+        if item_type is int:
+            chain_ids.append(item)
+            continue
+        if item_type is bool:
             raise ReconcileError("invalid JSON for chain-ids: booleans are not allowed", stop_service=False)
         try:
             chain_ids.append(int(item))
@@ -74,7 +113,7 @@ def build_render_config(
     *,
     gcs_credentials_file: str | None,
 ) -> dict[str, Any]:
-    delivery_mode = str(config.get("delivery-mode", "full")).strip().lower()
+    delivery_mode = config_str(config, "delivery-mode", "full").lower()
     if delivery_mode not in {"full", "webhook_only"}:
         raise ReconcileError(
             "invalid config: delivery-mode must be one of full, webhook_only",
@@ -82,9 +121,7 @@ def build_render_config(
         )
 
     chain_repository = _non_empty(config, "chain-repository")
-    rules = parse_json_array_option(
-        str(config.get("artifact-selection-rules", "[]")), "artifact-selection-rules"
-    )
+    rules = _json_array(config, "artifact-selection-rules")
     if any(not isinstance(rule, dict) for rule in rules):
         raise ReconcileError(
             "artifact-selection-rules must be a JSON array of objects", stop_service=False
@@ -113,29 +150,20 @@ def build_render_config(
         if expire_days > 0:
             nextcloud["share_expire_days"] = expire_days
 
-    chain_ids = _parse_chain_ids(
-        parse_json_array_option(str(config.get("chain-ids", "[]")), "chain-ids")
-    )
+    chain_ids = _parse_chain_ids(_json_array(config, "chain-ids"))
 
     rendered: dict[str, Any] = {
         "delivery_mode": delivery_mode,
         "poll_interval_seconds": int(config.get("poll-interval-seconds", 900)),
-        "state_dir": str(config.get("state-dir", str(c.STATE_DIR))),
-        "temp_dir": str(config.get("temp-dir", str(c.TEMP_DIR))),
+        "state_dir": config_str(config, "state-dir", str(c.STATE_DIR), strip=False),
+        "temp_dir": config_str(config, "temp-dir", str(c.TEMP_DIR), strip=False),
         "gcs": {
             "bucket": _non_empty(config, "gcs-bucket"),
             "anonymous": bool(config.get("gcs-anonymous", False)),
             "use_gcloud_cli": bool(config.get("gcs-use-gcloud-cli", False)),
-            "credentials_file": gcs_credentials_file,
-            "include_prefixes": parse_json_array_option(
-                str(config.get("gcs-include-prefixes", "[]")), "gcs-include-prefixes"
-            ),
-            "include_suffixes": parse_json_array_option(
-                str(config.get("gcs-include-suffixes", "[]")), "gcs-include-suffixes"
-            ),
-            "include_content_types": parse_json_array_option(
-                str(config.get("gcs-include-content-types", "[]")), "gcs-include-content-types"
-            ),
+            "include_prefixes": _json_array(config, "gcs-include-prefixes"),
+            "include_suffixes": _json_array(config, "gcs-include-suffixes"),
+            "include_content_types": _json_array(config, "gcs-include-content-types"),
         },
         "webhook": {
             "url": webhook.url,
@@ -146,72 +174,77 @@ def build_render_config(
         "chain": {
             "organization": _non_empty(config, "chain-organization"),
             "repository": chain_repository,
-            "common_name": str(config.get("chain-common-name", "")).strip() or chain_repository,
-            "extra_info": str(config.get("chain-extra-info", "")),
-            "client_name": str(config.get("chain-client-name", "")),
+            "common_name": config_str(config, "chain-common-name") or chain_repository,
+            "extra_info": config_str(config, "chain-extra-info", strip=False),
+            "client_name": config_str(config, "chain-client-name", strip=False),
             "chain_ids": chain_ids,
-            "genesis_hashes": parse_json_array_option(
-                str(config.get("chain-genesis-hashes", "[]")), "chain-genesis-hashes"
-            ),
+            "genesis_hashes": _json_array(config, "chain-genesis-hashes"),
         },
         "release_defaults": {
             "urgent": bool(config.get("release-defaults-urgent", False)),
             "priority": int(config.get("release-defaults-priority", 3)),
-            "due_date": str(config.get("release-defaults-due-date", "P2D")),
+            "due_date": config_str(config, "release-defaults-due-date", "P2D", strip=False),
         },
         "artifact_selection": {
             "enabled": bool(config.get("artifact-selection-enabled", True)),
             "fallback_to_archive": bool(config.get("artifact-selection-fallback-to-archive", True)),
-            "default_binary_patterns": parse_json_array_option(
-                str(config.get("artifact-selection-default-binary-patterns", "[]")),
-                "artifact-selection-default-binary-patterns",
+            "default_binary_patterns": _json_array(
+                config, "artifact-selection-default-binary-patterns"
             ),
-            "default_genesis_patterns": parse_json_array_option(
-                str(config.get("artifact-selection-default-genesis-patterns", "[]")),
-                "artifact-selection-default-genesis-patterns",
+            "default_genesis_patterns": _json_array(
+                config, "artifact-selection-default-genesis-patterns"
             ),
             "rules": rules,
         },
     }
+    if gcs_credentials_file is not None:
+        rendered["gcs"]["credentials_file"] = gcs_credentials_file
     if nextcloud is not None:
         rendered["nextcloud"] = nextcloud
     return rendered
 
 
 def render_service_unit(*, log_level: str) -> str:
-    template_text = _load_service_unit_template()
-    template = Template(template_text)
-    exec_start = (
-        f"{c.VENV_DIR}/bin/gcs-release-monitor --config {c.CONFIG_PATH} --log-level {log_level}"
-    )
-    return template.substitute(exec_start=exec_start)
+    exec_start = f"{c.MONITOR_BIN} --config {c.CONFIG_PATH} --log-level {log_level}"
+    return _service_unit_template(SERVICE_UNIT_TEMPLATE_PATH).substitute(exec_start=exec_start)
+
+
+def load_yaml(stream: str | bytes | IO[bytes]) -> Any:
+    return yaml.load(stream, Loader=_YAML_LOADER)
 
 
 def dump_yaml(data: dict[str, Any]) -> str:
-    return yaml.safe_dump(data, sort_keys=False)
+    return yaml.dump(data, Dumper=_YAML_DUMPER, sort_keys=False)
+
+
+def dump_yaml_bytes(data: dict[str, Any]) -> bytes:
+    return yaml.dump(data, Dumper=_YAML_DUMPER, sort_keys=False, encoding="utf-8")
 
 
 def redact_config(rendered: dict[str, Any]) -> dict[str, Any]:
-    cloned = json.loads(json.dumps(rendered))
+    cloned = dict(rendered)
     if isinstance(cloned.get("nextcloud"), dict):
-        if cloned["nextcloud"].get("app_password"):
-            cloned["nextcloud"]["app_password"] = "***"
-        if cloned["nextcloud"].get("share_password"):
-            cloned["nextcloud"]["share_password"] = "***"
+        nextcloud = cloned["nextcloud"] = dict(cloned["nextcloud"])
+        if nextcloud.get("app_password"):
+            nextcloud["app_password"] = "***"
+        if nextcloud.get("share_password"):
+            nextcloud["share_password"] = "***"
     if isinstance(cloned.get("webhook"), dict) and cloned["webhook"].get("shared_secret"):
-        cloned["webhook"]["shared_secret"] = "***"
+        cloned["webhook"] = {**cloned["webhook"], "shared_secret": "***"}
     return cloned
 
 
 def tail_text(raw: str, *, max_lines: int) -> str:
-    lines = [line for line in raw.strip().splitlines() if line]
-    if not lines:
-        return ""
-    return "\n".join(lines[-max_lines:])
+    lines = (line for line in raw.strip().splitlines() if line)
+    if max_lines <= 0:
+        return "\n".join(list(lines)[-max_lines:])
+    return "\n".join(deque(lines, maxlen=max_lines))
 
 
-def _load_service_unit_template() -> str:
+@lru_cache(maxsize=4)
+def _service_unit_template(path: Path) -> Template:
     try:
-        return SERVICE_UNIT_TEMPLATE_PATH.read_text(encoding="utf-8")
+        text = path.read_text(encoding="utf-8")
     except FileNotFoundError:
-        return DEFAULT_SERVICE_UNIT_TEMPLATE
+        text = DEFAULT_SERVICE_UNIT_TEMPLATE
+    return Template(text)
@@ -11,7 +11,10 @@ from pytest_operator.plugin import OpsTest
 
 import yaml
 
-CHARMCRAFT = yaml.safe_load(Path("./charmcraft.yaml").read_text(encoding="utf-8"))
+CHARMCRAFT = yaml.load(
+    Path("./charmcraft.yaml").read_text(encoding="utf-8"),
+    Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader),
+)
 APP_NAME = CHARMCRAFT["name"]
 
 
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import copy
+import io
+import subprocess
+import zipfile
+from collections.abc import Mapping
+from pathlib import Path, PurePath
+from types import MappingProxyType, SimpleNamespace
+from typing import Any
+
+import pytest
+from ops.testing import Context, Secret
+
+import constants as constants_module
+import release_monitor_gcloud as runtime_module
+from charm import ReleaseMonitorGcloudCharm
+from models import SecretBundle, WebhookResolution
+from rendering import build_render_config, dump_yaml_bytes, load_yaml
+
+
+def _unmocked_subprocess(*args: Any, **_kwargs: Any) -> None:
+    raise RuntimeError(f"unmocked subprocess call: {args[0] if args else '?'}")
+
+
+@pytest.fixture(autouse=True)
+def _no_subprocess(monkeypatch: pytest.MonkeyPatch) -> None:
+    for name in ("run", "call", "check_call", "check_output", "Popen"):
+        monkeypatch.setattr(subprocess, name, _unmocked_subprocess)
+
+
+@pytest.fixture(scope="session")
+def charm_spec() -> Mapping[str, Any]:
+    with Path("charmcraft.yaml").open("rb") as handle:
+        return MappingProxyType(load_yaml(handle))
+
+
+@pytest.fixture()
+def ctx(charm_spec: Mapping[str, Any]) -> Context:
+    return Context(ReleaseMonitorGcloudCharm, meta=copy.deepcopy(dict(charm_spec)), charm_root=Path("."))
+
+
+@pytest.fixture(scope="session")
+def base_config() -> Mapping[str, Any]:
+    return MappingProxyType(
+        {
+            "gcs-bucket": "bucket-a",
+            "nextcloud-base-url": "https://cloud.example",
+            "nextcloud-remote-dir": "release-mirror",
+            "chain-organization": "dwellir",
+            "chain-repository": "megaeth",
+            "chain-ids": "[]",
+            "chain-genesis-hashes": "[]",
+            "gcs-include-prefixes": "[]",
+            "gcs-include-suffixes": "[]",
+            "gcs-include-content-types": "[]",
+            "artifact-selection-default-binary-patterns": "[]",
+            "artifact-selection-default-genesis-patterns": "[]",
+            "artifact-selection-rules": "[]",
+            "nextcloud-credentials-secret-id": "secret:nextcloud",
+            "gcs-service-account-secret-id": "secret:gcs",
+            "webhook-url": "https://fallback.example/v1/releases",
+            "webhook-shared-secret-secret-id": "secret:webhook-fallback",
+            "log-level": "INFO",
+        }
+    )
+
+
+@pytest.fixture(scope="session")
+def base_secrets() -> tuple[Secret, ...]:
+    return (
+        Secret(
+            {"username": "jonathan", "app-password": "apppass", "share-password": "sharepass"},
+            id="secret:nextcloud",
+        ),
+        Secret(
+            {"service-account-json": '{"type":"service_account"}'},
+            id="secret:gcs",
+        ),
+        Secret({"shared-secret": "fallback-shared-secret"}, id="secret:webhook-fallback"),
+    )
+
+
+@pytest.fixture(scope="session")
+def base_secrets_by_id(base_secrets: tuple[Secret, ...]) -> Mapping[str, Secret]:
+    return MappingProxyType({secret.id: secret for secret in base_secrets})
+
+
+@pytest.fixture(scope="session")
+def valid_wheel_zip_bytes() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "gcs_release_monitor-0.1.0.dist-info/WHEEL",
+            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+        )
+        archive.writestr(
+            "gcs_release_monitor-0.1.0.dist-info/METADATA",
+            "Metadata-Version: 2.1\nName: gcs-release-monitor\nVersion: 0.1.0\n",
+        )
+    return buffer.getvalue()
+
+
+@pytest.fixture(scope="session")
+def known_good_config_bytes(base_config: Mapping[str, Any]) -> bytes:
+    secrets = SecretBundle(
+        nextcloud_username="jonathan",
+        nextcloud_app_password="apppass",
+        nextcloud_share_password="sharepass",
+        gcs_service_account_json=None,
+    )
+    webhook = WebhookResolution(
+        url=base_config["webhook-url"],
+        shared_secret="fallback-shared-secret",
+        source="config-fallback",
+    )
+    rendered = build_render_config(dict(base_config), secrets, webhook, gcs_credentials_file=None)
+    return dump_yaml_bytes(rendered)
+
+
+_CONST_ATTRS = (
+    ("APP_DIR", "app_dir"),
+    ("STATE_DIR", "state_dir"),
+    ("TEMP_DIR", "temp_dir"),
+    ("SECRETS_DIR", "secrets_dir"),
+    ("ETC_DIR", "etc_dir"),
+    ("CONFIG_PATH", "config_path"),
+    ("SERVICE_PATH", "service_path"),
+    ("VENV_DIR", "venv_dir"),
+    ("VENV_PYTHON", "venv_python"),
+    ("VENV_PIP", "venv_pip"),
+    ("MONITOR_BIN", "monitor_bin"),
+    ("GCS_CREDENTIALS_PATH", "gcs_credentials_path"),
+)
+
+
+@pytest.fixture(scope="session")
+def _path_layout() -> Mapping[str, PurePath]:
+    app_dir = PurePath("var", "lib", "release-monitor-gcloud")
+    secrets_dir = app_dir / "secrets"
+    etc_dir = PurePath("etc", "release-monitor-gcloud")
+    venv_dir = PurePath("opt", "release-monitor-gcloud", "venv")
+    return MappingProxyType(
+        {
+            "app_dir": app_dir,
+            "state_dir": app_dir / "state",
+            "temp_dir": app_dir / "tmp",
+            "secrets_dir": secrets_dir,
+            "etc_dir": etc_dir,
+            "config_path": etc_dir / "config.yaml",
+            "service_path": PurePath("etc", "systemd", "system", "release-monitor-gcloud.service"),
+            "venv_dir": venv_dir,
+            "venv_python": venv_dir / "bin" / "python",
+            "venv_pip": venv_dir / "bin" / "pip",
+            "monitor_bin": venv_dir / "bin" / "gcs-release-monitor",
+            "gcs_credentials_path": secrets_dir / "gcs-service-account.json",
+            "wheel_path": PurePath("gcs_release_monitor-0.1.0-py3-none-any.whl"),
+        }
+    )
+
+
+@pytest.fixture()
+def patched_paths(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    _path_layout: Mapping[str, PurePath],
+) -> SimpleNamespace:
+    paths = {key: tmp_path / relative for key, relative in _path_layout.items()}
+    for attr, key in _CONST_ATTRS:
+        monkeypatch.setattr(constants_module, attr, paths[key])
+    monkeypatch.setattr(runtime_module.shutil, "chown", lambda *_a, **_k: None)
+    monkeypatch.setattr(runtime_module, "_account_exists", lambda *_a: False)
+    monkeypatch.setattr(runtime_module, "_account_ids", lambda *_a: None)
+    return SimpleNamespace(**paths)
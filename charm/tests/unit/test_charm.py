@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import subprocess as sp
-import zipfile
+from collections import ChainMap
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import replace
 from pathlib import Path
-from typing import Any
+from types import SimpleNamespace
+from typing import Any, ClassVar
 
+import ops
 import pytest
 import yaml
 from ops.model import ActiveStatus, BlockedStatus
@@ -25,6 +30,32 @@ from charm import (
     parse_json_array_option,
 )
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _load_yaml(raw: str | bytes) -> Any:
+    return yaml.load(raw, Loader=_YAML_LOADER)
+
+
+def _read_rendered(path: Path) -> dict[str, Any]:
+    return _load_yaml(path.read_bytes())
+
+
+_OK: tuple[int, str, str] = (0, "", "")
+_COMPLETED_OK: sp.CompletedProcess[str] = sp.CompletedProcess(
+    args=(), returncode=0, stdout="", stderr=""
+)
+_SYSTEM_PROGRAMS = frozenset({"python3", "apt-get", "systemctl"})
+_VERSION_PROBE_PREFIX = "import importlib.metadata"
+_VALIDATE_SCRIPT_PREFIX = "from gcs_release_monitor.config import load_config"
+_SHEBANG = b"#!/bin/sh\n"
+
+
+def _seed_venv_bin(venv_dir: Path, name: str) -> None:
+    bin_dir = venv_dir / "bin"
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    (bin_dir / name).write_bytes(_SHEBANG)
+
 
 class FakeRunner:
     def __init__(
@@ -34,9 +65,12 @@ class FakeRunner:
         ensurepip_available: bool = True,
         pip_from_venv_creation: bool = True,
     ):
-        self.commands: list[list[str]] = []
+        self.commands: list[tuple[str, ...]] = []
+        self.prefixes: set[tuple[str, ...]] = set()
         self._service_active = False
+        self._service_enabled = False
         self._venv_dir = venv_dir
+        self._venv_bin_ready = False
         self._ensurepip_available = ensurepip_available
         self._pip_from_venv_creation = pip_from_venv_creation
 
@@ -49,139 +83,118 @@ class FakeRunner:
         capture_output: bool = False,
     ) -> sp.CompletedProcess[str]:
         del capture_output
-        self.commands.append(args)
-
-        rc = 0
-        stdout = ""
-        stderr = ""
-
-        if args[:3] == ["getent", "group", "release-monitor"]:
-            rc = 1
-        elif args[:3] == ["id", "-u", "release-monitor"]:
-            rc = 1
-        elif args[:3] == ["python3", "-m", "venv"]:
-            (self._venv_dir / "bin").mkdir(parents=True, exist_ok=True)
-            (self._venv_dir / "bin" / "python").write_text("#!/bin/sh\n", encoding="utf-8")
-            if self._pip_from_venv_creation:
-                (self._venv_dir / "bin" / "pip").write_text("#!/bin/sh\n", encoding="utf-8")
-        elif len(args) >= 3 and args[1:3] == ["-m", "ensurepip"]:
-            if self._ensurepip_available:
-                (self._venv_dir / "bin").mkdir(parents=True, exist_ok=True)
-                (self._venv_dir / "bin" / "pip").write_text("#!/bin/sh\n", encoding="utf-8")
-            else:
-                rc = 1
-                stderr = "/opt/release-monitor-gcloud/venv/bin/python: No module named ensurepip"
-        elif len(args) >= 4 and args[1:4] == ["-m", "pip", "install"]:
-            (self._venv_dir / "bin").mkdir(parents=True, exist_ok=True)
-            (self._venv_dir / "bin" / "gcs-release-monitor").write_text(
-                "#!/bin/sh\n", encoding="utf-8"
-            )
-        elif args[:4] == ["apt-get", "install", "-y", "python3-venv"]:
-            self._pip_from_venv_creation = True
-        elif len(args) >= 3 and args[1] == "-c" and "importlib.metadata" in args[2]:
-            stdout = "0.1.0\n"
-        elif len(args) >= 3 and args[1] == "-c" and "load_config" in args[2]:
-            rc = 0
-        elif args[:3] == ["systemctl", "is-active", "--quiet"]:
-            rc = 0 if self._service_active else 3
-        elif args[:2] == ["systemctl", "start"]:
-            self._service_active = True
-        elif args[:2] == ["systemctl", "restart"]:
-            self._service_active = True
-        elif args[:3] == ["systemctl", "disable", "--now"]:
-            self._service_active = False
-        elif args[:3] == ["systemctl", "enable", "release-monitor-gcloud.service"]:
-            rc = 0
+        command = tuple(args)
+        self.commands.append(command)
+        for start in (0, 1):
+            for end in range(start + 2, min(len(command), start + 4) + 1):
+                self.prefixes.add(command[start:end])
+
+        handler = self._DISPATCH.get(self._dispatch_key(command))
+        result = _OK if handler is None else handler(self, command)
+        if result is _OK:
+            return _COMPLETED_OK
+        rc, stdout, stderr = result
 
         if check and rc != 0:
             raise sp.CalledProcessError(rc, args, output=stdout, stderr=stderr)
         return sp.CompletedProcess(args=args, returncode=rc, stdout=stdout, stderr=stderr)
 
+    def reset(self) -> None:
+        self.commands.clear()
+        self.prefixes.clear()
 
-@pytest.fixture()
-def ctx() -> Context:
-    return Context(ReleaseMonitorGcloudCharm, charm_root=Path("."))
+    @staticmethod
+    def _dispatch_key(command: tuple[str, ...]) -> tuple[str, ...]:
+        if command[0] in _SYSTEM_PROGRAMS:
+            return command[:2]
+        if command[1:2] == ("-c",):
+            return ("-c",)
+        return command[1:3]
 
+    def _write_venv_bin(self, name: str) -> None:
+        if not self._venv_bin_ready:
+            (self._venv_dir / "bin").mkdir(parents=True, exist_ok=True)
+            self._venv_bin_ready = True
+        (self._venv_dir / "bin" / name).write_bytes(_SHEBANG)
+
+    def _venv(self, _args: tuple[str, ...]) -> tuple[int, str, str]:
+        self._write_venv_bin("python")
+        if self._pip_from_venv_creation:
+            self._write_venv_bin("pip")
+        return _OK
+
+    def _ensurepip(self, _args: tuple[str, ...]) -> tuple[int, str, str]:
+        if not self._ensurepip_available:
+            return 1, "", "/opt/release-monitor-gcloud/venv/bin/python: No module named ensurepip"
+        self._write_venv_bin("pip")
+        return _OK
+
+    def _pip(self, args: tuple[str, ...]) -> tuple[int, str, str]:
+        if args[3:4] == ("install",):
+            self._write_venv_bin("gcs-release-monitor")
+        return _OK
+
+    def _apt_get_install(self, args: tuple[str, ...]) -> tuple[int, str, str]:
+        if "python3-venv" in args:
+            self._pip_from_venv_creation = True
+        return _OK
 
-@pytest.fixture()
-def base_config() -> dict[str, Any]:
-    return {
-        "gcs-bucket": "bucket-a",
-        "nextcloud-base-url": "https://cloud.example",
-        "nextcloud-remote-dir": "release-mirror",
-        "chain-organization": "dwellir",
-        "chain-repository": "megaeth",
-        "chain-ids": "[]",
-        "chain-genesis-hashes": "[]",
-        "gcs-include-prefixes": "[]",
-        "gcs-include-suffixes": "[]",
-        "gcs-include-content-types": "[]",
-        "artifact-selection-default-binary-patterns": "[]",
-        "artifact-selection-default-genesis-patterns": "[]",
-        "artifact-selection-rules": "[]",
-        "nextcloud-credentials-secret-id": "secret:nextcloud",
-        "gcs-service-account-secret-id": "secret:gcs",
-        "webhook-url": "https://fallback.example/v1/releases",
-        "webhook-shared-secret-secret-id": "secret:webhook-fallback",
-        "log-level": "INFO",
-    }
+    def _python_script(self, args: tuple[str, ...]) -> tuple[int, str, str]:
+        if args[2].startswith(_VERSION_PROBE_PREFIX):
+            return 0, "0.1.0\n", ""
+        return _OK
 
+    def _is_active(self, _args: tuple[str, ...]) -> tuple[int, str, str]:
+        return (0 if self._service_active else 3), "", ""
 
-@pytest.fixture()
-def base_secrets() -> list[Secret]:
-    return [
-        Secret(
-            {"username": "jonathan", "app-password": "apppass", "share-password": "sharepass"},
-            id="secret:nextcloud",
-        ),
-        Secret(
-            {"service-account-json": '{"type":"service_account"}'},
-            id="secret:gcs",
-        ),
-        Secret({"shared-secret": "fallback-shared-secret"}, id="secret:webhook-fallback"),
-    ]
+    def _show(self, _args: tuple[str, ...]) -> tuple[int, str, str]:
+        active_state = "active" if self._service_active else "inactive"
+        unit_file_state = "enabled" if self._service_enabled else "disabled"
+        return 0, f"ActiveState={active_state}\nUnitFileState={unit_file_state}\n", ""
 
+    def _start(self, _args: tuple[str, ...]) -> tuple[int, str, str]:
+        self._service_active = True
+        return _OK
 
-@pytest.fixture()
-def patched_paths(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> dict[str, Path]:
-    app_dir = tmp_path / "var" / "lib" / "release-monitor-gcloud"
-    state_dir = app_dir / "state"
-    temp_dir = app_dir / "tmp"
-    secrets_dir = app_dir / "secrets"
-    etc_dir = tmp_path / "etc" / "release-monitor-gcloud"
-    service_path = tmp_path / "etc" / "systemd" / "system" / "release-monitor-gcloud.service"
-    venv_dir = tmp_path / "opt" / "release-monitor-gcloud" / "venv"
-
-    monkeypatch.setattr(constants_module, "APP_DIR", app_dir)
-    monkeypatch.setattr(constants_module, "STATE_DIR", state_dir)
-    monkeypatch.setattr(constants_module, "TEMP_DIR", temp_dir)
-    monkeypatch.setattr(constants_module, "SECRETS_DIR", secrets_dir)
-    monkeypatch.setattr(constants_module, "ETC_DIR", etc_dir)
-    monkeypatch.setattr(constants_module, "CONFIG_PATH", etc_dir / "config.yaml")
-    monkeypatch.setattr(constants_module, "SERVICE_PATH", service_path)
-    monkeypatch.setattr(constants_module, "VENV_DIR", venv_dir)
-    monkeypatch.setattr(
-        constants_module, "GCS_CREDENTIALS_PATH", secrets_dir / "gcs-service-account.json"
-    )
-    monkeypatch.setattr(runtime_module.shutil, "chown", lambda *_a, **_k: None)
-
-    return {
-        "app_dir": app_dir,
-        "state_dir": state_dir,
-        "temp_dir": temp_dir,
-        "secrets_dir": secrets_dir,
-        "etc_dir": etc_dir,
-        "config_path": etc_dir / "config.yaml",
-        "service_path": service_path,
-        "venv_dir": venv_dir,
-        "wheel_path": tmp_path / "gcs_release_monitor-0.1.0-py3-none-any.whl",
+    def _enable(self, args: tuple[str, ...]) -> tuple[int, str, str]:
+        self._service_enabled = True
+        if "--now" in args:
+            self._service_active = True
+        return _OK
+
+    def _disable(self, args: tuple[str, ...]) -> tuple[int, str, str]:
+        self._service_enabled = False
+        if "--now" in args:
+            self._service_active = False
+        return _OK
+
+    _DISPATCH: ClassVar[
+        dict[tuple[str, ...], Callable[[FakeRunner, tuple[str, ...]], tuple[int, str, str]]]
+    ] = {
+        ("python3", "-m"): _venv,
+        ("-m", "ensurepip"): _ensurepip,
+        ("-m", "pip"): _pip,
+        ("-c",): _python_script,
+        ("apt-get", "install"): _apt_get_install,
+        ("systemctl", "is-active"): _is_active,
+        ("systemctl", "show"): _show,
+        ("systemctl", "start"): _start,
+        ("systemctl", "restart"): _start,
+        ("systemctl", "enable"): _enable,
+        ("systemctl", "disable"): _disable,
     }
 
 
+def _ran_config_validation(runner: FakeRunner) -> bool:
+    return any(
+        cmd[1:2] == ("-c",) and cmd[2].startswith(_VALIDATE_SCRIPT_PREFIX) for cmd in runner.commands
+    )
+
+
 def _state(
     *,
-    config: dict[str, Any],
-    secrets: list[Secret],
+    config: Mapping[str, Any],
+    secrets: Iterable[Secret],
     wheel_path: Path | None,
     relation: Relation | None = None,
     planned_units: int = 1,
@@ -219,6 +232,35 @@ def test_parse_json_array_option_rejects_non_array():
         parse_json_array_option('{"k": 1}', "x")
 
 
+def test_parse_json_array_option_rejects_invalid_json():
+    with pytest.raises(ReconcileError, match="invalid JSON for x: ") as exc_info:
+        parse_json_array_option('["rpc/",', "x")
+    assert exc_info.value.stop_service is False
+
+
+def test_parse_json_array_option_keeps_stdlib_json_semantics():
+    parsed = parse_json_array_option("[NaN, 18446744073709551616]", "x")
+
+    assert parsed[0] != parsed[0]
+    assert parsed[1] == 2**64
+
+
+def test_parse_json_array_option_returns_independent_lists():
+    first = parse_json_array_option('["rpc/"]', "x")
+    first.append("mutated")
+
+    assert parse_json_array_option('["rpc/"]', "x") == ["rpc/"]
+
+
+def test_parse_json_array_option_returns_independent_nested_objects():
+    raw = '[{"organization": "x", "binary_patterns": ["rpc-*"]}]'
+    first = parse_json_array_option(raw, "x")
+    first[0]["organization"] = "MUTATED"
+    first[0]["binary_patterns"].append("mutated")
+
+    assert parse_json_array_option(raw, "x") == [{"organization": "x", "binary_patterns": ["rpc-*"]}]
+
+
 def test_build_render_config_maps_charm_keys_to_app_schema():
     cfg = {
         "poll-interval-seconds": 123,
@@ -255,6 +297,7 @@ def test_build_render_config_maps_charm_keys_to_app_schema():
     assert rendered["chain"]["organization"] == "org"
     assert rendered["release_defaults"]["due_date"] == "P2D"
     assert rendered["artifact_selection"]["default_binary_patterns"] == ["rpc-node-*"]
+    assert "credentials_file" not in rendered["gcs"]
 
 
 def test_build_render_config_webhook_only_omits_nextcloud_section():
@@ -286,45 +329,99 @@ def test_build_render_config_webhook_only_omits_nextcloud_section():
     assert "nextcloud" not in rendered
 
 
+def test_build_render_config_webhook_only_ignores_nextcloud_numbers():
+    cfg = {
+        "delivery-mode": "webhook_only",
+        "gcs-bucket": "bucket-a",
+        "chain-organization": "org",
+        "chain-repository": "repo",
+        "nextcloud-share-expire-days": "abc",
+    }
+    secrets = SecretBundle(
+        nextcloud_username=None,
+        nextcloud_app_password=None,
+        nextcloud_share_password=None,
+        gcs_service_account_json=None,
+    )
+    webhook = WebhookResolution(url="https://hook", shared_secret="secret", source="relation")
+
+    rendered = _build_render_config(cfg, secrets, webhook, gcs_credentials_file=None)
+
+    assert "nextcloud" not in rendered
+
+
+def test_chain_ids_accept_integers_and_numeric_strings_but_not_booleans():
+    assert rendering_module._parse_chain_ids([1, "2", 3.0]) == [1, 2, 3]
+    with pytest.raises(ReconcileError, match="booleans are not allowed"):
+        rendering_module._parse_chain_ids([1, True])
+    with pytest.raises(ReconcileError, match="'x' is not an integer"):
+        rendering_module._parse_chain_ids(["x"])
+
+
+def test_redact_config_masks_secrets_without_mutating_input():
+    rendered = {
+        "nextcloud": {"app_password": "apppass", "share_password": "sharepass", "username": "u"},
+        "webhook": {"url": "https://hook", "shared_secret": "secret"},
+    }
+
+    redacted = rendering_module.redact_config(rendered)
+
+    assert redacted["nextcloud"] == {"app_password": "***", "share_password": "***", "username": "u"}
+    assert redacted["webhook"] == {"url": "https://hook", "shared_secret": "***"}
+    assert rendered["nextcloud"]["app_password"] == "apppass"
+    assert rendered["webhook"]["shared_secret"] == "secret"
+
+
+def test_tail_text_keeps_last_non_empty_lines():
+    raw = "\nfirst\n\nsecond\nthird\n\n"
+
+    assert rendering_module.tail_text(raw, max_lines=2) == "second\nthird"
+    assert rendering_module.tail_text(raw, max_lines=20) == "first\nsecond\nthird"
+    assert rendering_module.tail_text("  \n", max_lines=20) == ""
+    assert rendering_module.tail_text("a\r\nb\r\n\r\nc", max_lines=2) == "b\nc"
+    assert rendering_module.tail_text("a\rb\rc", max_lines=2) == "b\nc"
+    assert rendering_module.tail_text("first\nsecond", max_lines=0) == "first\nsecond"
+
+
 def test_install_event_creates_runtime_dirs_and_unit_file(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     state = _state(
         config=base_config,
         secrets=base_secrets,
-        wheel_path=patched_paths["wheel_path"],
+        wheel_path=patched_paths.wheel_path,
     )
     out = ctx.run(ctx.on.install(), state)
 
     assert isinstance(out.unit_status, ActiveStatus)
-    assert patched_paths["state_dir"].exists()
-    assert patched_paths["temp_dir"].exists()
-    assert patched_paths["secrets_dir"].exists()
-    assert patched_paths["config_path"].exists()
-    assert patched_paths["service_path"].exists()
+    assert patched_paths.state_dir.exists()
+    assert patched_paths.temp_dir.exists()
+    assert patched_paths.secrets_dir.exists()
+    assert patched_paths.config_path.exists()
+    assert patched_paths.service_path.exists()
 
-    assert any(cmd[:3] == ["python3", "-m", "venv"] for cmd in runner.commands)
-    assert any(cmd[:2] == ["groupadd", "--system"] for cmd in runner.commands)
-    assert any(cmd[:2] == ["systemctl", "daemon-reload"] for cmd in runner.commands)
+    assert ("python3", "-m", "venv") in runner.prefixes
+    assert ("groupadd", "--system") in runner.prefixes
+    assert ("systemctl", "daemon-reload") in runner.prefixes
 
 
 def test_install_event_chowns_rendered_config_for_service_user(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     chown_calls: list[tuple[Path, str | None, str | None]] = []
@@ -337,59 +434,80 @@ def test_install_event_chowns_rendered_config_for_service_user(
     state = _state(
         config=base_config,
         secrets=base_secrets,
-        wheel_path=patched_paths["wheel_path"],
+        wheel_path=patched_paths.wheel_path,
     )
     out = ctx.run(ctx.on.install(), state)
 
     assert isinstance(out.unit_status, ActiveStatus)
     assert any(
-        path == patched_paths["config_path"]
+        path == patched_paths.config_path
         and user == constants_module.APP_USER
         and group == constants_module.APP_GROUP
         for path, user, group in chown_calls
     )
-    assert patched_paths["config_path"].stat().st_mode & 0o777 == 0o640
+    assert patched_paths.config_path.stat().st_mode & 0o777 == 0o640
+
+
+def test_runtime_dirs_are_only_chmodded_when_mode_differs(
+    patched_paths: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    chmodded: list[Path] = []
+    real_chmod = runtime_module.os.chmod
+
+    def _recording_chmod(path: Path, mode: int) -> None:
+        chmodded.append(Path(path))
+        real_chmod(path, mode)
+
+    monkeypatch.setattr(runtime_module.os, "chmod", _recording_chmod)
+    runtime = runtime_module.ReleaseMonitorRuntime(SimpleNamespace())
+
+    runtime._ensure_runtime_dirs()
+    assert patched_paths.state_dir in chmodded
+    assert patched_paths.etc_dir.is_dir()
+
+    chmodded.clear()
+    runtime._ensure_runtime_dirs()
+    assert chmodded == []
 
 
 def test_install_event_bootstraps_pip_when_missing_from_existing_venv(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    (patched_paths["venv_dir"] / "bin").mkdir(parents=True, exist_ok=True)
-    (patched_paths["venv_dir"] / "bin" / "python").write_text("#!/bin/sh\n", encoding="utf-8")
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    _seed_venv_bin(patched_paths.venv_dir, "python")
 
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     state = _state(
         config=base_config,
         secrets=base_secrets,
-        wheel_path=patched_paths["wheel_path"],
+        wheel_path=patched_paths.wheel_path,
     )
     out = ctx.run(ctx.on.install(), state)
 
     assert isinstance(out.unit_status, ActiveStatus)
-    assert any(len(cmd) >= 3 and cmd[1:3] == ["-m", "ensurepip"] for cmd in runner.commands)
-    assert any(len(cmd) >= 4 and cmd[1:4] == ["-m", "pip", "install"] for cmd in runner.commands)
+    assert ("-m", "ensurepip") in runner.prefixes
+    assert ("-m", "pip", "install") in runner.prefixes
 
 
 def test_install_event_recovers_when_ensurepip_missing(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    (patched_paths["venv_dir"] / "bin").mkdir(parents=True, exist_ok=True)
-    (patched_paths["venv_dir"] / "bin" / "python").write_text("#!/bin/sh\n", encoding="utf-8")
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    _seed_venv_bin(patched_paths.venv_dir, "python")
 
     runner = FakeRunner(
-        venv_dir=patched_paths["venv_dir"],
+        venv_dir=patched_paths.venv_dir,
         ensurepip_available=False,
         pip_from_venv_creation=False,
     )
@@ -398,36 +516,29 @@ def test_install_event_recovers_when_ensurepip_missing(
     state = _state(
         config=base_config,
         secrets=base_secrets,
-        wheel_path=patched_paths["wheel_path"],
+        wheel_path=patched_paths.wheel_path,
     )
     out = ctx.run(ctx.on.install(), state)
 
     assert isinstance(out.unit_status, ActiveStatus)
-    assert any(cmd[:2] == ["apt-get", "update"] for cmd in runner.commands)
-    assert any(cmd[:4] == ["apt-get", "install", "-y", "python3-venv"] for cmd in runner.commands)
-    assert any(cmd[:4] == ["python3", "-m", "venv", "--clear"] for cmd in runner.commands)
-    assert any(len(cmd) >= 4 and cmd[1:4] == ["-m", "pip", "install"] for cmd in runner.commands)
+    assert ("apt-get", "update") in runner.prefixes
+    assert ("apt-get", "install", "-y", "python3-venv") in runner.prefixes
+    assert ("python3", "-m", "venv", "--clear") in runner.prefixes
+    assert ("-m", "pip", "install") in runner.prefixes
 
 
 def test_install_event_normalizes_invalid_wheel_filename(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
+    valid_wheel_zip_bytes: bytes,
 ):
-    invalid_wheel_path = patched_paths["wheel_path"].with_name("gcs_release_monitor.whl")
-    with zipfile.ZipFile(invalid_wheel_path, "w") as archive:
-        archive.writestr(
-            "gcs_release_monitor-0.1.0.dist-info/WHEEL",
-            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
-        )
-        archive.writestr(
-            "gcs_release_monitor-0.1.0.dist-info/METADATA",
-            "Metadata-Version: 2.1\nName: gcs-release-monitor\nVersion: 0.1.0\n",
-        )
-
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    invalid_wheel_path = patched_paths.wheel_path.with_name("gcs_release_monitor.whl")
+    invalid_wheel_path.write_bytes(valid_wheel_zip_bytes)
+
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     state = _state(
@@ -439,19 +550,19 @@ def test_install_event_normalizes_invalid_wheel_filename(
 
     assert isinstance(out.unit_status, ActiveStatus)
     pip_install = next(
-        cmd for cmd in runner.commands if len(cmd) >= 4 and cmd[1:4] == ["-m", "pip", "install"]
+        cmd for cmd in runner.commands if len(cmd) >= 4 and cmd[1:4] == ("-m", "pip", "install")
     )
     assert pip_install[-1].endswith("gcs_release_monitor-0.1.0-py3-none-any.whl")
 
 
 def test_missing_release_monitor_wheel_blocks(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     state = _state(config=base_config, secrets=base_secrets, wheel_path=None)
@@ -459,87 +570,78 @@ def test_missing_release_monitor_wheel_blocks(
 
     assert isinstance(out.unit_status, BlockedStatus)
     assert "missing required resource" in out.unit_status.message
-    assert not any(cmd[:3] == ["systemctl", "disable", "--now"] for cmd in runner.commands)
-
-
-def test_missing_required_secret_field_blocks(
-    ctx: Context,
-    base_config: dict[str, Any],
-    patched_paths: dict[str, Path],
-    monkeypatch: pytest.MonkeyPatch,
-):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
-    _patch_runner(monkeypatch, runner)
-
-    bad_secrets = [
-        Secret({"username": "jonathan"}, id="secret:nextcloud"),
-        Secret({"service-account-json": "{}"}, id="secret:gcs"),
-        Secret({"shared-secret": "fallback-shared-secret"}, id="secret:webhook-fallback"),
-    ]
-
-    state = _state(config=base_config, secrets=bad_secrets, wheel_path=patched_paths["wheel_path"])
-    out = ctx.run(ctx.on.config_changed(), state)
-
-    assert isinstance(out.unit_status, BlockedStatus)
-    assert "app-password" in out.unit_status.message
-
-
-def test_nextcloud_underscore_secret_key_is_rejected(
-    ctx: Context,
-    base_config: dict[str, Any],
-    patched_paths: dict[str, Path],
-    monkeypatch: pytest.MonkeyPatch,
-):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
-    _patch_runner(monkeypatch, runner)
-
-    bad_secrets = [
-        Secret({"username": "jonathan", "app_password": "apppass"}, id="secret:nextcloud"),
-        Secret({"service-account-json": "{}"}, id="secret:gcs"),
-        Secret({"shared-secret": "fallback-shared-secret"}, id="secret:webhook-fallback"),
-    ]
-
-    state = _state(config=base_config, secrets=bad_secrets, wheel_path=patched_paths["wheel_path"])
-    out = ctx.run(ctx.on.config_changed(), state)
-
-    assert isinstance(out.unit_status, BlockedStatus)
-    assert "app-password" in out.unit_status.message
-
-
-def test_gcs_underscore_secret_key_is_rejected(
+    assert ("systemctl", "disable", "--now") not in runner.prefixes
+
+
+@pytest.mark.parametrize(
+    ("overrides", "nextcloud_content", "gcs_content", "expected"),
+    [
+        pytest.param(
+            {},
+            {"username": "jonathan"},
+            {"service-account-json": "{}"},
+            "app-password",
+            id="missing-nextcloud-app-password",
+        ),
+        pytest.param(
+            {},
+            {"username": "jonathan", "app_password": "apppass"},
+            {"service-account-json": "{}"},
+            "app-password",
+            id="nextcloud-underscore-key",
+        ),
+        pytest.param(
+            {},
+            {"username": "jonathan", "app-password": "apppass"},
+            {"service_account_json": "{}"},
+            "service-account-json",
+            id="gcs-underscore-key",
+        ),
+        pytest.param(
+            {"delivery-mode": "invalid"},
+            {"username": "jonathan", "app-password": "apppass"},
+            {"service-account-json": '{"type":"service_account"}'},
+            "delivery-mode must be one of full, webhook_only",
+            id="invalid-delivery-mode",
+        ),
+    ],
+)
+def test_config_changed_blocks_on_invalid_input(
     ctx: Context,
-    base_config: dict[str, Any],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
+    overrides: dict[str, str],
+    nextcloud_content: dict[str, str],
+    gcs_content: dict[str, str],
+    expected: str,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
-    bad_secrets = [
-        Secret({"username": "jonathan", "app-password": "apppass"}, id="secret:nextcloud"),
-        Secret({"service_account_json": "{}"}, id="secret:gcs"),
+    secrets = [
+        Secret(nextcloud_content, id="secret:nextcloud"),
+        Secret(gcs_content, id="secret:gcs"),
         Secret({"shared-secret": "fallback-shared-secret"}, id="secret:webhook-fallback"),
     ]
-
-    state = _state(config=base_config, secrets=bad_secrets, wheel_path=patched_paths["wheel_path"])
+    config = ChainMap(overrides, base_config)
+    state = _state(config=config, secrets=secrets, wheel_path=patched_paths.wheel_path)
     out = ctx.run(ctx.on.config_changed(), state)
 
     assert isinstance(out.unit_status, BlockedStatus)
-    assert "service-account-json" in out.unit_status.message
+    assert expected in out.unit_status.message
 
 
 def test_relation_secret_id_precedence_over_fallback(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     relation = Relation(
@@ -555,94 +657,292 @@ def test_relation_secret_id_precedence_over_fallback(
     )
 
     secrets = list(base_secrets) + [
-        Secret({"shared-secret": "relation-secret"}, id="secret:relation")
+        Secret({"shared-secret": " relation-secret\n"}, id="secret:relation")
     ]
     state = _state(
         config=base_config,
         secrets=secrets,
-        wheel_path=patched_paths["wheel_path"],
+        wheel_path=patched_paths.wheel_path,
         relation=relation,
     )
     out = ctx.run(ctx.on.install(), state)
 
     assert isinstance(out.unit_status, ActiveStatus)
     assert "relation-secret-id" in out.unit_status.message
-    rendered = yaml.safe_load(patched_paths["config_path"].read_text(encoding="utf-8"))
+    rendered = _read_rendered(patched_paths.config_path)
     assert rendered["webhook"]["url"] == "https://relation.example/v1/releases"
     assert rendered["webhook"]["shared_secret"] == "relation-secret"
 
 
 def test_relation_broken_uses_config_fallback(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     state = _state(
         config=base_config,
         secrets=base_secrets,
-        wheel_path=patched_paths["wheel_path"],
+        wheel_path=patched_paths.wheel_path,
     )
     out = ctx.run(ctx.on.config_changed(), state)
 
     assert isinstance(out.unit_status, ActiveStatus)
     assert "config-fallback" in out.unit_status.message
-    rendered = yaml.safe_load(patched_paths["config_path"].read_text(encoding="utf-8"))
+    rendered = _read_rendered(patched_paths.config_path)
     assert rendered["webhook"]["url"] == "https://fallback.example/v1/releases"
     assert rendered["webhook"]["shared_secret"] == "fallback-shared-secret"
 
 
-def test_invalid_candidate_config_keeps_last_known_good(
+def test_secret_shared_between_options_is_fetched_once_per_hook(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets_by_id: Mapping[str, Secret],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
-    state = _state(
-        config=base_config,
-        secrets=base_secrets,
-        wheel_path=patched_paths["wheel_path"],
+    fetched: list[str] = []
+    original_get_secret = ops.Model.get_secret
+
+    def _counting_get_secret(self: ops.Model, *, id: str | None = None, label: str | None = None):
+        fetched.append(str(id))
+        return original_get_secret(self, id=id, label=label)
+
+    monkeypatch.setattr(ops.Model, "get_secret", _counting_get_secret)
+
+    config = ChainMap(
+        {
+            "gcs-service-account-secret-id": "secret:shared",
+            "webhook-shared-secret-secret-id": "secret:shared",
+        },
+        base_config,
     )
-    ctx.run(ctx.on.install(), state)
-    previous = patched_paths["config_path"].read_text(encoding="utf-8")
+    secrets = [
+        base_secrets_by_id["secret:nextcloud"],
+        Secret(
+            {"service-account-json": '{"type":"service_account"}', "shared-secret": "shared"},
+            id="secret:shared",
+        ),
+    ]
+    out = ctx.run(
+        ctx.on.config_changed(),
+        _state(config=config, secrets=secrets, wheel_path=patched_paths.wheel_path),
+    )
+
+    assert isinstance(out.unit_status, ActiveStatus)
+    assert fetched.count("secret:shared") == 1
+
+
+def test_invalid_candidate_config_keeps_last_known_good(
+    ctx: Context,
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    known_good_config_bytes: bytes,
+    patched_paths: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
+    _patch_runner(monkeypatch, runner)
+    patched_paths.etc_dir.mkdir(parents=True)
+    patched_paths.config_path.write_bytes(known_good_config_bytes)
 
     def fail_validate(_self: ReleaseMonitorGcloudCharm, _path: Path) -> None:
         raise ReconcileError("invalid rendered config: test", stop_service=False)
 
     monkeypatch.setattr(ReleaseMonitorGcloudCharm, "_validate_candidate_config", fail_validate)
 
-    bad_config = dict(base_config)
-    bad_config["release-defaults-due-date"] = "P99D"
+    bad_config = ChainMap({"release-defaults-due-date": "P99D"}, base_config)
     out = ctx.run(
         ctx.on.config_changed(),
-        _state(config=bad_config, secrets=base_secrets, wheel_path=patched_paths["wheel_path"]),
+        _state(config=bad_config, secrets=base_secrets, wheel_path=patched_paths.wheel_path),
     )
 
     assert isinstance(out.unit_status, BlockedStatus)
     assert "invalid rendered config" in out.unit_status.message
-    current = patched_paths["config_path"].read_text(encoding="utf-8")
-    assert current == previous
+    assert patched_paths.config_path.read_bytes() == known_good_config_bytes
+
+
+def test_update_status_skips_full_reconcile_when_inputs_unchanged(
+    ctx: Context,
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
+    _patch_runner(monkeypatch, runner)
+
+    state = _state(
+        config=base_config,
+        secrets=base_secrets,
+        wheel_path=patched_paths.wheel_path,
+    )
+    installed = ctx.run(ctx.on.install(), state)
+    runner.reset()
+
+    out = ctx.run(ctx.on.update_status(), installed)
+
+    assert isinstance(out.unit_status, ActiveStatus)
+    assert runner.commands == [("systemctl", "is-active", "--quiet", "release-monitor-gcloud.service")]
+
+    changed = ChainMap({"poll-interval-seconds": 60}, base_config)
+    runner.reset()
+    out = ctx.run(ctx.on.update_status(), replace(installed, config=changed))
+
+    assert isinstance(out.unit_status, ActiveStatus)
+    assert _ran_config_validation(runner)
+
+
+def test_config_changed_without_changes_skips_restart_and_revalidation(
+    ctx: Context,
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
+    _patch_runner(monkeypatch, runner)
+
+    state = _state(
+        config=base_config,
+        secrets=base_secrets,
+        wheel_path=patched_paths.wheel_path,
+    )
+    installed = ctx.run(ctx.on.install(), state)
+    runner.reset()
+
+    out = ctx.run(ctx.on.config_changed(), installed)
+
+    assert isinstance(out.unit_status, ActiveStatus)
+    assert ("systemctl", "show") in runner.prefixes
+    assert ("systemctl", "enable") not in runner.prefixes
+    assert ("systemctl", "is-active") not in runner.prefixes
+    assert ("systemctl", "restart") not in runner.prefixes
+    assert ("systemctl", "daemon-reload") not in runner.prefixes
+    assert not _ran_config_validation(runner)
+
+    runner.reset()
+    out = ctx.run(ctx.on.upgrade_charm(), installed)
+
+    assert isinstance(out.unit_status, ActiveStatus)
+    assert _ran_config_validation(runner)
+
+
+def test_externally_modified_unit_file_is_rewritten(
+    ctx: Context,
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
+    _patch_runner(monkeypatch, runner)
+
+    state = _state(
+        config=base_config,
+        secrets=base_secrets,
+        wheel_path=patched_paths.wheel_path,
+    )
+    installed = ctx.run(ctx.on.install(), state)
+    unit_bytes = patched_paths.service_path.read_bytes()
+    patched_paths.service_path.write_bytes(b"[Unit]\n")
+    runner.reset()
+
+    out = ctx.run(ctx.on.config_changed(), installed)
+
+    assert isinstance(out.unit_status, ActiveStatus)
+    assert ("systemctl", "daemon-reload") in runner.prefixes
+    assert patched_paths.service_path.read_bytes() == unit_bytes
+
+
+def test_validate_candidate_config_runs_loader_with_venv_interpreter(
+    patched_paths: SimpleNamespace,
+    tmp_path: Path,
+):
+    commands: list[list[str]] = []
+
+    def _run(args: list[str], *, capture_output: bool, check: bool) -> sp.CompletedProcess[str]:
+        del capture_output, check
+        commands.append(args)
+        if "bad" in args[2]:
+            return sp.CompletedProcess(args=args, returncode=1, stdout="", stderr="bad config\n")
+        return sp.CompletedProcess(args=args, returncode=0, stdout="", stderr="")
+
+    runtime = runtime_module.ReleaseMonitorRuntime(SimpleNamespace(_run=_run))
+    runtime.validate_candidate_config(tmp_path / "good.yaml")
+    with pytest.raises(ReconcileError, match="invalid rendered config: bad config"):
+        runtime.validate_candidate_config(tmp_path / "bad.yaml")
+
+    assert [cmd[:2] for cmd in commands] == [[str(patched_paths.venv_dir / "bin" / "python"), "-c"]] * 2
+
+
+def test_installed_package_version_reads_venv_metadata_in_process(
+    patched_paths: SimpleNamespace,
+):
+    dist_info = (
+        patched_paths.venv_dir
+        / "lib"
+        / "python3.10"
+        / "site-packages"
+        / "gcs_release_monitor-0.2.0.dist-info"
+    )
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: gcs-release-monitor\nVersion: 0.2.0\n", encoding="utf-8"
+    )
+
+    def _unexpected_run(*_args: Any, **_kwargs: Any) -> None:
+        raise AssertionError("version probe should not spawn a subprocess")
+
+    runtime = runtime_module.ReleaseMonitorRuntime(SimpleNamespace(_run=_unexpected_run))
+    python_bin = patched_paths.venv_dir / "bin" / "python"
+    assert runtime._installed_package_version(python_bin) == "0.2.0"
+
+
+def test_wheel_digest_matches_with_and_without_file_digest(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+):
+    wheel_path = tmp_path / "monitor.whl"
+    wheel_path.write_bytes(b"wheel-bytes" * 200_000)
+    expected = hashlib.blake2b(wheel_path.read_bytes(), digest_size=32).hexdigest()
+    runtime = runtime_module.ReleaseMonitorRuntime(SimpleNamespace())
+
+    assert runtime._wheel_digest(wheel_path) == expected
+    monkeypatch.setattr(runtime_module, "_FILE_DIGEST", None)
+    assert runtime._wheel_digest(wheel_path) == expected
+
+
+def test_canonical_json_is_key_order_independent():
+    first = {"b": [1, None], "a": {"y": True, "x": "v"}}
+    second = {"a": {"x": "v", "y": True}, "b": [1, None]}
+
+    assert runtime_module._canonical_json(first) == runtime_module._canonical_json(second)
+    assert runtime_module._canonical_json(first) == b'{"a":{"x":"v","y":true},"b":[1,null]}'
 
 
 def test_single_unit_guard_blocks_scale_greater_than_one(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
     out = ctx.run(
@@ -650,78 +950,53 @@ def test_single_unit_guard_blocks_scale_greater_than_one(
         _state(
             config=base_config,
             secrets=base_secrets,
-            wheel_path=patched_paths["wheel_path"],
+            wheel_path=patched_paths.wheel_path,
             planned_units=2,
         ),
     )
 
     assert isinstance(out.unit_status, BlockedStatus)
     assert "single-unit charm; scale to 1" in out.unit_status.message
-    assert any(cmd[:3] == ["systemctl", "disable", "--now"] for cmd in runner.commands)
+    assert ("systemctl", "disable", "--now") in runner.prefixes
 
 
 def test_webhook_only_mode_allows_missing_nextcloud_secret(
     ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
+    base_config: Mapping[str, Any],
+    base_secrets_by_id: Mapping[str, Secret],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
     _patch_runner(monkeypatch, runner)
 
-    config = dict(base_config)
-    config["delivery-mode"] = "webhook_only"
-    config["nextcloud-credentials-secret-id"] = ""
-    secrets = [secret for secret in base_secrets if secret.id != "secret:nextcloud"]
+    config = ChainMap(
+        {"delivery-mode": "webhook_only", "nextcloud-credentials-secret-id": ""}, base_config
+    )
+    secrets = [base_secrets_by_id["secret:gcs"], base_secrets_by_id["secret:webhook-fallback"]]
 
     out = ctx.run(
         ctx.on.config_changed(),
-        _state(config=config, secrets=secrets, wheel_path=patched_paths["wheel_path"]),
+        _state(config=config, secrets=secrets, wheel_path=patched_paths.wheel_path),
     )
 
     assert isinstance(out.unit_status, ActiveStatus)
-    rendered = yaml.safe_load(patched_paths["config_path"].read_text(encoding="utf-8"))
+    rendered = _read_rendered(patched_paths.config_path)
     assert rendered["delivery_mode"] == "webhook_only"
     assert "nextcloud" not in rendered
 
 
-def test_invalid_delivery_mode_blocks(
-    ctx: Context,
-    base_config: dict[str, Any],
-    base_secrets: list[Secret],
-    patched_paths: dict[str, Path],
-    monkeypatch: pytest.MonkeyPatch,
-):
-    patched_paths["wheel_path"].write_bytes(b"wheel")
-    runner = FakeRunner(venv_dir=patched_paths["venv_dir"])
-    _patch_runner(monkeypatch, runner)
-
-    config = dict(base_config)
-    config["delivery-mode"] = "invalid"
-    out = ctx.run(
-        ctx.on.config_changed(),
-        _state(config=config, secrets=base_secrets, wheel_path=patched_paths["wheel_path"]),
-    )
-
-    assert isinstance(out.unit_status, BlockedStatus)
-    assert "delivery-mode must be one of full, webhook_only" in out.unit_status.message
-
-
 def test_run_once_and_dry_run_actions_invoke_expected_flags(
     ctx: Context,
-    patched_paths: dict[str, Path],
+    patched_paths: SimpleNamespace,
     monkeypatch: pytest.MonkeyPatch,
 ):
-    (patched_paths["venv_dir"] / "bin").mkdir(parents=True, exist_ok=True)
-    (patched_paths["venv_dir"] / "bin" / "gcs-release-monitor").write_text(
-        "#!/bin/sh\n", encoding="utf-8"
-    )
-    patched_paths["config_path"].parent.mkdir(parents=True, exist_ok=True)
-    patched_paths["config_path"].write_text("gcs: {}\n", encoding="utf-8")
+    _seed_venv_bin(patched_paths.venv_dir, "gcs-release-monitor")
+    patched_paths.config_path.parent.mkdir(parents=True, exist_ok=True)
+    patched_paths.config_path.write_bytes(b"gcs: {}\n")
 
-    commands: list[list[str]] = []
+    observed: set[tuple[bool, bool]] = set()
 
     def fake_run(
         _self: ReleaseMonitorGcloudCharm,
@@ -731,7 +1006,8 @@ def test_run_once_and_dry_run_actions_invoke_expected_flags(
         capture_output: bool = False,
     ) -> sp.CompletedProcess[str]:
         del check, capture_output
-        commands.append(args)
+        flags = set(args)
+        observed.add(("--once" in flags, "--dry-run" in flags))
         return sp.CompletedProcess(args=args, returncode=0, stdout="ok\n", stderr="")
 
     monkeypatch.setattr(ReleaseMonitorGcloudCharm, "_run", fake_run)
@@ -740,8 +1016,35 @@ def test_run_once_and_dry_run_actions_invoke_expected_flags(
     ctx.run(ctx.on.action("run-once"), state)
     ctx.run(ctx.on.action("run-once-dry-run"), state)
 
-    assert any("--once" in cmd and "--dry-run" not in cmd for cmd in commands)
-    assert any("--once" in cmd and "--dry-run" in cmd for cmd in commands)
+    assert (True, False) in observed
+    assert (True, True) in observed
+
+
+def test_show_effective_config_action_redacts_installed_config(
+    ctx: Context,
+    base_config: Mapping[str, Any],
+    base_secrets: tuple[Secret, ...],
+    patched_paths: SimpleNamespace,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    patched_paths.wheel_path.write_bytes(b"wheel")
+    runner = FakeRunner(venv_dir=patched_paths.venv_dir)
+    _patch_runner(monkeypatch, runner)
+
+    state = _state(
+        config=base_config,
+        secrets=base_secrets,
+        wheel_path=patched_paths.wheel_path,
+    )
+    installed = ctx.run(ctx.on.install(), state)
+    ctx.run(ctx.on.action("show-effective-config"), installed)
+
+    assert ctx.action_results is not None
+    assert ctx.action_results["webhook-source"] == "config-fallback"
+    shown = _load_yaml(ctx.action_results["config"])
+    assert shown["gcs"]["bucket"] == "bucket-a"
+    assert shown["webhook"]["shared_secret"] == "***"
+    assert shown["nextcloud"]["app_password"] == "***"
 
 
 def test_render_service_unit_uses_embedded_fallback_when_template_missing(
@@ -762,6 +1065,49 @@ def test_render_service_unit_uses_embedded_fallback_when_template_missing(
     ) in unit_text
 
 
+def test_render_service_unit_reads_template_once_per_path(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+):
+    template_path = tmp_path / "release-monitor-gcloud.service.tmpl"
+    template_path.write_text("ExecStart=${exec_start}\n", encoding="utf-8")
+    monkeypatch.setattr(rendering_module, "SERVICE_UNIT_TEMPLATE_PATH", template_path)
+
+    first = rendering_module.render_service_unit(log_level="INFO")
+    template_path.write_text("changed\n", encoding="utf-8")
+    second = rendering_module.render_service_unit(log_level="DEBUG")
+
+    assert first.startswith("ExecStart=")
+    assert second == first.replace("--log-level INFO", "--log-level DEBUG")
+
+
+def test_render_service_unit_keeps_string_template_semantics(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+):
+    template_path = tmp_path / "release-monitor-gcloud.service.tmpl"
+    template_path.write_text("Environment=HOME=$$HOME\nExecStart=$exec_start\n", encoding="utf-8")
+    monkeypatch.setattr(rendering_module, "SERVICE_UNIT_TEMPLATE_PATH", template_path)
+
+    unit_text = rendering_module.render_service_unit(log_level="INFO")
+
+    assert unit_text.startswith("Environment=HOME=$HOME\nExecStart=/")
+    assert unit_text.endswith("--log-level INFO\n")
+
+    unknown_path = tmp_path / "unknown.service.tmpl"
+    unknown_path.write_text("ExecStart=${exec_start} ${unknown}\n", encoding="utf-8")
+    monkeypatch.setattr(rendering_module, "SERVICE_UNIT_TEMPLATE_PATH", unknown_path)
+    with pytest.raises(KeyError):
+        rendering_module.render_service_unit(log_level="INFO")
+
+
 def test_gcs_credentials_path_constant_points_inside_app_dir():
     assert str(GCS_CREDENTIALS_PATH).startswith(str(APP_DIR))
     assert str(CONFIG_PATH).endswith("config.yaml")
+
+
+def test_ctx_fixture_starts_without_histories_from_other_tests(ctx: Context):
+    assert ctx.juju_log == []
+    assert ctx.unit_status_history == []
+    assert ctx.app_status_history == []
+    assert ctx.emitted_events == []
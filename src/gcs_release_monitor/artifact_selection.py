@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
-from fnmatch import fnmatch
+from fnmatch import translate
+from functools import lru_cache
 from pathlib import Path
+import re
+import shutil
 import tarfile
 
 from .config import ArtifactSelectionConfig, ArtifactSelectionRule, ChainConfig
 
+_COPY_BUFFER_SIZE = 1 << 20
+
 
 @dataclass(frozen=True)
 class UploadCandidate:
@@ -28,18 +34,17 @@ def select_upload_candidates(
 ) -> list[UploadCandidate]:
     if not config.enabled:
         return []
-    if not tarfile.is_tarfile(str(archive_path)):
-        return []
 
     rule = _match_rule(chain, config)
     if rule is None:
         return []
 
     try:
-        with tarfile.open(archive_path, mode="r:*") as handle:
-            members = [member for member in handle.getmembers() if member.isfile()]
-            binary_member = _find_member_by_patterns(members, rule.binary_patterns)
-            genesis_member = _find_member_by_patterns(members, rule.genesis_patterns)
+        handle = _open_archive(archive_path)
+        if handle is None:
+            return []
+        with handle:
+            binary_member, genesis_member = _select_members(handle, rule)
             if binary_member is None or genesis_member is None:
                 raise ArtifactSelectionError("required binary/genesis members not found")
 
@@ -61,6 +66,13 @@ def select_upload_candidates(
         raise ArtifactSelectionError(str(exc)) from exc
 
 
+def _open_archive(archive_path: Path) -> tarfile.TarFile | None:
+    try:
+        return tarfile.open(archive_path, mode="r:*")
+    except tarfile.TarError:
+        return None
+
+
 def _match_rule(chain: ChainConfig, config: ArtifactSelectionConfig) -> ArtifactSelectionRule | None:
     for rule in config.rules:
         if rule.organization and rule.organization != chain.organization:
@@ -79,18 +91,48 @@ def _match_rule(chain: ChainConfig, config: ArtifactSelectionConfig) -> Artifact
     return None
 
 
-def _find_member_by_patterns(members: list[tarfile.TarInfo], patterns: tuple[str, ...]) -> tarfile.TarInfo | None:
-    for pattern in patterns:
-        matches = [member for member in members if _matches(member.name, pattern)]
-        if matches:
-            matches.sort(key=lambda member: member.name)
-            return matches[0]
+_Match = tuple[int, str, tarfile.TarInfo]
+
+
+def _select_members(
+    handle: tarfile.TarFile,
+    rule: ArtifactSelectionRule,
+) -> tuple[tarfile.TarInfo | None, tarfile.TarInfo | None]:
+    binary: _Match | None = None
+    genesis: _Match | None = None
+    for member in handle:
+        if not member.isfile():
+            continue
+        basename = Path(member.name).name
+        binary = _better_match(binary, member, basename, rule.binary_patterns)
+        genesis = _better_match(genesis, member, basename, rule.genesis_patterns)
+    return (
+        binary[2] if binary is not None else None,
+        genesis[2] if genesis is not None else None,
+    )
+
+
+def _better_match(
+    current: _Match | None, member: tarfile.TarInfo, basename: str, patterns: tuple[str, ...]
+) -> _Match | None:
+    rank = _pattern_rank(member.name, basename, patterns)
+    if rank is None:
+        return current
+    if current is None or (rank, member.name) < current[:2]:
+        return rank, member.name, member
+    return current
+
+
+def _pattern_rank(member_name: str, basename: str, patterns: tuple[str, ...]) -> int | None:
+    for index, match in enumerate(_compiled_patterns(patterns)):
+        if match(member_name) or match(basename):
+            return index
     return None
 
 
-def _matches(member_name: str, pattern: str) -> bool:
-    basename = Path(member_name).name
-    return fnmatch(member_name, pattern) or fnmatch(basename, pattern)
+@lru_cache(maxsize=64)
+def _compiled_patterns(patterns: tuple[str, ...]) -> tuple[Callable[[str], re.Match[str] | None], ...]:
+    return tuple(re.compile(translate(pattern)).match for pattern in patterns)
 
 
 def _extract_member(
@@ -101,12 +143,13 @@ def _extract_member(
 ) -> UploadCandidate:
     if member.size <= 0:
         raise ArtifactSelectionError(f"member has invalid size: {member.name}")
+    # Pass the TarInfo itself: extractfile(name) re-scans the member list to find the offset.
     fileobj = handle.extractfile(member)
     if fileobj is None:
         raise ArtifactSelectionError(f"failed to read member: {member.name}")
-    data = fileobj.read()
     destination.parent.mkdir(parents=True, exist_ok=True)
-    destination.write_bytes(data)
+    with fileobj, destination.open("wb") as target:
+        shutil.copyfileobj(fileobj, target, _COPY_BUFFER_SIZE)
     return UploadCandidate(
         local_path=destination,
         output_name=Path(member.name).name,
@@ -8,6 +8,8 @@ import yaml
 
 from .types import ARCHIVE_SUFFIX_DEFAULTS, CONTENT_TYPE_DEFAULTS
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 class ConfigError(ValueError):
     pass
@@ -225,7 +227,7 @@ def _parse_artifact_selection(raw: dict[str, Any]) -> ArtifactSelectionConfig:
 def load_config(path: str | Path) -> AppConfig:
     config_path = Path(path)
     with config_path.open("r", encoding="utf-8") as handle:
-        raw = yaml.safe_load(handle)
+        raw = yaml.load(handle, Loader=_YAML_LOADER)
 
     if not isinstance(raw, dict):
         raise ConfigError("Top-level config must be a mapping")
@@ -67,6 +67,48 @@ def test_select_upload_candidates_extracts_binary_and_genesis(tmp_path: Path) ->
     assert selected[1].local_path.exists()
 
 
+def test_select_upload_candidates_copies_member_contents_larger_than_buffer(tmp_path: Path) -> None:
+    archive_path = tmp_path / "release.tar.gz"
+    binary = bytes(range(256)) * 8193
+    _write_tar(
+        archive_path,
+        {
+            "megaeth-rpc-v2.0.9/rpc-node-v2.0.9": binary,
+            "megaeth-rpc-v2.0.9/mainnet/genesis.json": b"{}",
+        },
+    )
+
+    selected = select_upload_candidates(archive_path, tmp_path / "extract", _chain(), _config())
+
+    assert selected[0].local_path.read_bytes() == binary
+    assert selected[1].local_path.read_bytes() == b"{}"
+
+
+def test_select_upload_candidates_prefers_earlier_pattern_then_smallest_name(tmp_path: Path) -> None:
+    archive_path = tmp_path / "release.tar.gz"
+    _write_tar(
+        archive_path,
+        {
+            "a/rpc-node-v1.0.0": b"old",
+            "c/rpc-node-v2.0.0": b"newer-c",
+            "b/rpc-node-v2.1.0": b"newer-b",
+            "a/mainnet/genesis.json": b"{}",
+        },
+    )
+    config = ArtifactSelectionConfig(
+        enabled=True,
+        fallback_to_archive=True,
+        default_binary_patterns=("rpc-node-v2*", "rpc-node-*"),
+        default_genesis_patterns=("genesis.json",),
+        rules=(),
+    )
+
+    selected = select_upload_candidates(archive_path, tmp_path / "extract", _chain(), config)
+
+    assert selected[0].source_member == "b/rpc-node-v2.1.0"
+    assert selected[0].local_path.read_bytes() == b"newer-b"
+
+
 def test_select_upload_candidates_raises_when_required_files_missing(tmp_path: Path) -> None:
     archive_path = tmp_path / "release.tar.gz"
     _write_tar(
@@ -95,3 +137,11 @@ def test_select_upload_candidates_returns_empty_when_no_rule_matches(tmp_path: P
 
     selected = select_upload_candidates(archive_path, tmp_path / "extract", chain, _config())
     assert selected == []
+
+
+def test_select_upload_candidates_returns_empty_for_non_tar_archive(tmp_path: Path) -> None:
+    archive_path = tmp_path / "release.zip"
+    archive_path.write_bytes(b"PK\x03\x04 not a tarball")
+
+    selected = select_upload_candidates(archive_path, tmp_path / "extract", _chain(), _config())
+    assert selected == []